@@ -1,26 +1,50 @@
 import time
-from typing import Callable, Dict, List, Optional
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import httpx
 from pathlib import Path
 import os
 import threading
 import hashlib
 import queue
+import secrets
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from api.book import Book
 from api.play_book import PlayBook
 from api.session import Session
 
 from .library import Library, LibraryItem
+from .media_proxy import MediaProxy
+from .sparse_cache import SparseAudioFile
+from .seek_index import SeekIndex, build_seek_index
+
+
+class DownloadAborted(Exception):
+    """Raised inside download_audio when its checkpoint abandons the transfer."""
+
 
 class API:
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
         self.player = None
         self.token = None
+        self.on_unauthorized: Optional[Callable[[str], None]] = None
         self.client = httpx.Client()
-        self.sessions:List[Session] = []
+        # Playback sessions not yet closed on the server, by library item,
+        # least recently opened first. A session goes stale when another
+        # book is played; stale ones are closed in the background.
+        self.sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self.max_open_sessions = 8
         self.current_session = None
+        self._sessions_lock = threading.Lock()
+        # The server closes one session per request (there's no batch
+        # endpoint), so stale sessions are closed concurrently instead.
+        self._session_closer: Optional[ThreadPoolExecutor] = None
+        self.session_close_workers = 4
 
 
         cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
@@ -34,6 +58,24 @@ class API:
         self.max_cache_size_gb = 4
         self.cache_expiry_days = 30 # Cache files expire after 30 days
 
+        # Started on first use by proxy_url
+        self.media_proxy: Optional[MediaProxy] = None
+        # Block caches of partially fetched files, by cache key, least
+        # recently used first; idle ones past max_sparse_files are dropped
+        # (their bitmaps are on disk and reload on next use)
+        self._sparse_files: 'OrderedDict[str, SparseAudioFile]' = OrderedDict()
+        self.max_sparse_files = 16
+        self._sparse_lock = threading.Lock()
+        # cache key -> [lock, users]; one transfer per key at a time
+        self._transfers: Dict[str, list] = {}
+        self._transfers_lock = threading.Lock()
+        # Partial files older than this were left behind by an earlier run
+        self.stale_partial_seconds = 24 * 60 * 60
+        # Seek indexes in memory, least recently used first; the rest are on disk
+        self._seek_indexes: 'OrderedDict[str, SeekIndex]' = OrderedDict()
+        self.max_seek_indexes = 32
+        self._seek_indexes_lock = threading.Lock()
+
         self.sync_timer = None
         self.min_listen_threshold = 30 # Minimum seconds to consider "worth" syncing
 
@@ -47,6 +89,17 @@ class API:
     def set_token(self, token: str):
         self.token = token
 
+    def set_unauthorized_callback(self, callback: Callable[[str], None]):
+        """
+        Set a callback for requests rejected with 401.
+        Receives the token that was rejected. May be called from any thread.
+        """
+        self.on_unauthorized = callback
+
+    def _check_unauthorized(self, response: httpx.Response):
+        if response.status_code == 401 and self.token and self.on_unauthorized:
+            self.on_unauthorized(self.token)
+
     def request(self, method: str, endpoint: str, **kwargs):
         """Make an API request with authentication."""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
@@ -57,6 +110,9 @@ class API:
 
         try:
             response =  self.client.request(method, url, headers=headers, **kwargs)
+            if response.status_code == 401:
+                self._check_unauthorized(response)
+                return None
             return response.json()
         except httpx.HTTPStatusError as e:
             print(f"API Error: {e.response.status_code} - {e.response.text}")
@@ -76,6 +132,7 @@ class API:
             return response
         except httpx.HTTPStatusError as e:
             print(f"API Error: {e.response.status_code} - {e.response.text}")
+            self._check_unauthorized(e.response)
         except httpx.RequestError as e:
             print(f"Network Error: {e}")
         return None
@@ -88,6 +145,7 @@ class API:
             return response
         except httpx.HTTPStatusError as e:
             print(f"API Error: {e.response.status_code} - {e.response.text}")
+            self._check_unauthorized(e.response)
             raise
         except httpx.RequestError as e:
             print(f"Network Error: {e}")
@@ -96,6 +154,8 @@ class API:
     def login(self, username: str, password: str) -> bool:
         """Perform login and store token asynchronously."""
         data = {"username": username, "password": password}
+        # Don't send (or report a 401 for) a token we're about to replace.
+        self.set_token(None)
         response =  self.request("POST", "login", json=data)
 
         if response and "user" in response:
@@ -148,6 +208,92 @@ class API:
 
         return None
 
+    def _new_partial_audio_path(self, cache_key: str) -> Path:
+        """
+        A fresh path to download an audio file to, renamed into place once
+        complete. Every transfer gets its own, so overlapping transfers of
+        one key never write, rename or delete each other's file.
+        """
+        return self.audio_cache_dir / f"{cache_key}.{secrets.token_hex(4)}.mp3.part"
+
+    @contextmanager
+    def _transfer_slot(self, cache_key: str):
+        """Serialize the transfers of one cache key."""
+        with self._transfers_lock:
+            slot = self._transfers.setdefault(cache_key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._transfers_lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._transfers[cache_key]
+
+    def _move_into_cache(self, partial_path: Path, cache_path: Path):
+        try:
+            os.replace(partial_path, cache_path)
+        except PermissionError:
+            # Windows won't rename a file a reader (a progressive stream)
+            # still has open. Copy it instead; cleanup sweeps up the partial.
+            copy_path = partial_path.with_name(partial_path.name + ".assembling")
+            shutil.copyfile(partial_path, copy_path)
+            os.replace(copy_path, cache_path)
+            self._remove_partial(partial_path)
+
+    @staticmethod
+    def _remove_partial(partial_path: Path):
+        try:
+            partial_path.unlink(missing_ok=True)
+        except OSError:
+            # Still open somewhere (Windows); left for the stale sweep.
+            pass
+
+    def _get_sparse_audio_dir(self, cache_key: str) -> Path:
+        """Where the blocks of a partially fetched file are kept."""
+        return self.audio_cache_dir / f"{cache_key}.blocks"
+
+    def sparse_audio(self, cache_key: str) -> SparseAudioFile:
+        """The block cache for a file, shared by everyone reading or filling it."""
+        with self._sparse_lock:
+            sparse = self._sparse_files.get(cache_key)
+            if sparse is None:
+                sparse = SparseAudioFile(self._get_sparse_audio_dir(cache_key))
+                self._sparse_files[cache_key] = sparse
+            self._sparse_files.move_to_end(cache_key)
+
+            # Only idle entries can go; one in use must stay the shared instance.
+            excess = len(self._sparse_files) - self.max_sparse_files
+            for key, other in list(self._sparse_files.items()):
+                if excess <= 0:
+                    break
+                if other is not sparse and not other.readers:
+                    del self._sparse_files[key]
+                    excess -= 1
+            return sparse
+
+    def _peek_sparse_audio(self, cache_key: str) -> SparseAudioFile:
+        """
+        The block cache for a file without marking it used: the shared
+        instance if one is open, otherwise a copy read from disk that isn't
+        kept, so a pass over every file doesn't churn the LRU.
+        """
+        with self._sparse_lock:
+            sparse = self._sparse_files.get(cache_key)
+        return sparse or SparseAudioFile(self._get_sparse_audio_dir(cache_key))
+
+    def _discard_sparse_audio(self, cache_key: str):
+        """Drop the block cache of a file that is now cached whole."""
+        with self._sparse_lock:
+            sparse = self._sparse_files.pop(cache_key, None)
+        if sparse is None and not self._get_sparse_audio_dir(cache_key).exists():
+            return
+        (sparse or SparseAudioFile(self._get_sparse_audio_dir(cache_key))).remove()
+
+    def _get_seek_index_path(self, cache_key: str) -> Path:
+        return self.audio_cache_dir / f"{cache_key}.seek.json"
+
     def _get_file_cache_key(self, book_title: str, file_index: int) -> str:
         """Generate a stable cache key from book title and file index."""
         title_hash = hashlib.md5(book_title.encode('utf-8')).hexdigest()
@@ -182,33 +328,295 @@ class API:
             print(f"Error downloading cover for item {item_id}")
             return ""
 
-    def download_audio(self, cache_key: str, url: str, progress_callback: Optional[Callable[[int,int], None]] = None) -> Optional[Path]:
-        """Download and cache an audio file, returning the path if successful."""
+    def download_audio(self, cache_key: str, url: str, progress_callback: Optional[Callable[[int,int], None]] = None,
+                       checkpoint: Optional[Callable[[], bool]] = None,
+                       partial_path: Optional[Path] = None) -> Optional[Path]:
+        """
+        Download and cache an audio file, returning the path if successful.
+        `checkpoint` is called between chunks; it may block to pause the
+        transfer, and returning False abandons it (the partial file is removed).
+        Data goes to `partial_path` (a fresh one by default) first and is
+        flushed before each progress_callback, so the file can be read while
+        it downloads. Transfers of the same key run one at a time.
+        """
+        partial_path = Path(partial_path) if partial_path else self._new_partial_audio_path(cache_key)
+        with self._transfer_slot(cache_key):
+            # An earlier transfer of this key may have finished while we waited.
+            existing = self._get_audio_path(cache_key)
+            if existing:
+                return existing
+            return self._download_audio(cache_key, url, partial_path, progress_callback, checkpoint)
+
+    def _download_audio(self, cache_key: str, url: str, partial_path: Path,
+                        progress_callback: Optional[Callable[[int,int], None]],
+                        checkpoint: Optional[Callable[[], bool]]) -> Optional[Path]:
         cache_path = self.audio_cache_dir / f"{cache_key}.mp3"
-                       
-        existing = self._get_audio_path(cache_key)
-        if existing:
-            return existing
-        response = self.stream_request(url)
-        if not response:
-            return None
+
+        endpoint = f"{self.base_url}/{url.lstrip('/')}"
         try:
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-
-            with open(cache_path, 'wb') as f:
-                for chunk in response.iter_bytes(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if progress_callback and total_size > 0:
-                            progress_callback(downloaded, total_size)
+            # Stream the body so a paused or abandoned transfer stops using bandwidth.
+            with self.client.stream("GET", endpoint, headers=self.get_auth_headers(), follow_redirects=True) as response:
+                response.raise_for_status()
+                total_size = int(response.headers.get('content-length', 0))
+                downloaded = 0
+
+                with open(partial_path, 'wb') as f:
+                    for chunk in response.iter_bytes(chunk_size=8192):
+                        if checkpoint and not checkpoint():
+                            raise DownloadAborted(url)
+                        if chunk:
+                            f.write(chunk)
+                            downloaded += len(chunk)
+                            if progress_callback:
+                                f.flush()
+                                progress_callback(downloaded, total_size)
+            self._move_into_cache(partial_path, cache_path)
+            self._discard_sparse_audio(cache_key)
             self._cleanup_cache_if_needed()
             return cache_path
+        except DownloadAborted:
+            print(f"Download of {url} abandoned")
+        except httpx.HTTPStatusError as e:
+            print(f"API Error: {e.response.status_code}")
+            self._check_unauthorized(e.response)
         except Exception as e:
             print(f"Error caching audio file: {e}")
-            if cache_path.exists():
-                cache_path.unlink()
+
+        self._remove_partial(partial_path)
+        return None
+
+    def stream_url(self, url: str) -> str:
+        """Absolute upstream URL of a media file. Requests need get_auth_headers()."""
+        if url.startswith(("http://", "https://")):
+            return url
+        return f"{self.base_url}/{url.lstrip('/')}"
+
+    def proxy_url(self, cache_key: str, url: str, mime_type: Optional[str] = None) -> str:
+        """A local, unauthenticated URL that streams a media file through the caching proxy."""
+        if self.media_proxy is None:
+            self.media_proxy = MediaProxy(self)
+        return self.media_proxy.url_for(cache_key, url, mime_type)
+
+    def is_proxy_url(self, url: str) -> bool:
+        """Whether `url` streams through the media proxy (see proxy_url)."""
+        return self.media_proxy is not None and self.media_proxy.serves(url)
+
+    def _ensure_sparse_size(self, sparse: SparseAudioFile, url: str) -> bool:
+        """Make sure the block cache knows the file's size, asking the server if needed."""
+        if sparse.size is not None:
+            return True
+        try:
+            with self.client.stream("GET", self.stream_url(url), headers={**self.get_auth_headers(), "Range": "bytes=0-0"},
+                                    follow_redirects=True) as response:
+                response.raise_for_status()
+                content_range = response.headers.get("content-range", "")
+                if "/" in content_range and not content_range.endswith("/*"):
+                    sparse.set_size(int(content_range.rsplit("/", 1)[1]))
+                elif response.headers.get("content-length"):
+                    # Range ignored; the length is the whole file.
+                    sparse.set_size(int(response.headers["content-length"]))
+        except httpx.HTTPStatusError as e:
+            print(f"API Error: {e.response.status_code}")
+            self._check_unauthorized(e.response)
+        except (httpx.RequestError, ValueError) as e:
+            print(f"Network Error: {e}")
+        return sparse.size is not None
+
+    def _fetch_blocks(self, sparse: SparseAudioFile, url: str, first: int, last: int,
+                      checkpoint: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[int, bytes]]:
+        """Fetch blocks [first, last] in one ranged request, storing and yielding each as it completes."""
+        start = sparse.block_range(first)[0]
+        end = sparse.block_range(last)[1]
+        headers = {**self.get_auth_headers(), "Range": f"bytes={start}-{end - 1}"}
+        with self.client.stream("GET", self.stream_url(url), headers=headers, follow_redirects=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206 and start > 0:
+                raise ValueError("Server ignored the range request")
+
+            buffer = bytearray()
+            index = first
+            for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                if checkpoint and not checkpoint():
+                    raise DownloadAborted(url)
+                buffer += chunk
+                while index <= last:
+                    block_start, block_end = sparse.block_range(index)
+                    if len(buffer) < block_end - block_start:
+                        break
+                    data = bytes(buffer[:block_end - block_start])
+                    del buffer[:block_end - block_start]
+                    sparse.write_block(index, data)
+                    yield index, data
+                    index += 1
+                if index > last:
+                    break
+
+    def _promote_sparse_audio(self, cache_key: str, sparse: SparseAudioFile):
+        """Once every block of a file is cached, turn it into a normal cache entry."""
+        cache_path = self.audio_cache_dir / f"{cache_key}.mp3"
+        if not sparse.is_complete() or cache_path.exists():
+            return
+        try:
+            sparse.assemble(cache_path)
+            self._discard_sparse_audio(cache_key)
+        except OSError as e:
+            print(f"Error assembling cached file {cache_key}: {e}")
+
+    @staticmethod
+    def _iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                data = f.read(min(64 * 1024, end - position))
+                if not data:
+                    return
+                position += len(data)
+                yield data
+
+    def iter_audio_range(self, cache_key: str, url: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Bytes [start, end) of a media file. Cached blocks are read locally;
+        missing ones are fetched from the server and cached on the way.
+        """
+        complete = self._get_audio_path(cache_key)
+        if complete:
+            yield from self._iter_file_range(complete, start, end)
+            return
+
+        sparse = self.sparse_audio(cache_key)
+        with sparse.reading():
+            yield from self._iter_sparse_range(cache_key, url, sparse, start, end)
+
+    def _iter_sparse_range(self, cache_key: str, url: str, sparse: SparseAudioFile,
+                           start: int, end: int) -> Iterator[bytes]:
+        if not self._ensure_sparse_size(sparse, url):
+            raise ValueError(f"Size of {url} is unknown")
+        fetched_any = False
+        end = min(end, sparse.size)
+        last = (end - 1) // sparse.block_size
+        index = start // sparse.block_size
+
+        while index <= last:
+            complete = self._get_audio_path(cache_key)
+            if complete:
+                # Promoted (or downloaded) meanwhile; read the rest from the whole file.
+                yield from self._iter_file_range(complete, max(start, index * sparse.block_size), end)
+                return
+
+            if sparse.has_block(index):
+                try:
+                    blocks = [(index, sparse.read_block(index))]
+                except FileNotFoundError:
+                    # Evicted under us; forget it and fetch it again.
+                    sparse.evict_block(index)
+                    continue
+            else:
+                _first, run_last = sparse.missing_run(index, last)
+                blocks = self._fetch_blocks(sparse, url, index, run_last)
+                fetched_any = True
+
+            fetched_from = index
+            for block_index, data in blocks:
+                block_start = block_index * sparse.block_size
+                yield data[max(start - block_start, 0):min(end - block_start, len(data))]
+                index = block_index + 1
+            if index == fetched_from:
+                raise ValueError(f"No data for block {index} of {url}")
+
+        self._promote_sparse_audio(cache_key, sparse)
+        if fetched_any:
+            self._cleanup_cache_if_needed()
+
+    def ensure_audio_range(self, cache_key: str, url: str, start: int, end: int,
+                           checkpoint: Optional[Callable[[], bool]] = None) -> bool:
+        """Cache bytes [start, end) of a media file, fetching only the blocks that are missing."""
+        if self._get_audio_path(cache_key):
+            return True
+
+        sparse = self.sparse_audio(cache_key)
+        try:
+            with sparse.reading():
+                return self._ensure_sparse_range(cache_key, url, sparse, start, end, checkpoint)
+        except DownloadAborted:
+            return False
+        except httpx.HTTPStatusError as e:
+            print(f"API Error: {e.response.status_code}")
+            self._check_unauthorized(e.response)
+        except Exception as e:
+            print(f"Error caching range of {url}: {e}")
+        return False
+
+    def _ensure_sparse_range(self, cache_key: str, url: str, sparse: SparseAudioFile, start: int, end: int,
+                             checkpoint: Optional[Callable[[], bool]]) -> bool:
+        if not self._ensure_sparse_size(sparse, url):
+            return False
+        end = min(end, sparse.size)
+        first, last = start // sparse.block_size, (end - 1) // sparse.block_size
+        total_fetched = 0
+        while True:
+            run = sparse.missing_run(first, last)
+            if run is None:
+                break
+            fetched = sum(1 for _block in self._fetch_blocks(sparse, url, run[0], run[1], checkpoint))
+            if not fetched:
+                return False
+            total_fetched += fetched
+        if total_fetched:
+            self._promote_sparse_audio(cache_key, sparse)
+            self._cleanup_cache_if_needed()
+        return True
+
+    def seek_index(self, cache_key: str, url: str, build: bool = True) -> Optional[SeekIndex]:
+        """
+        Time-to-byte index of a media file, kept next to its cache entry.
+        Building it reads the file's headers (through the block cache when
+        it isn't cached whole), so pass build=False where that can't wait.
+        """
+        with self._seek_indexes_lock:
+            index = self._seek_indexes.get(cache_key)
+            if index:
+                self._seek_indexes.move_to_end(cache_key)
+                return index
+
+        path = self._get_seek_index_path(cache_key)
+        index = SeekIndex.load(path)
+        if index is None and build:
+            index = self._build_seek_index(cache_key, url)
+            if index:
+                try:
+                    index.save(path)
+                except OSError as e:
+                    print(f"Error saving seek index for {cache_key}: {e}")
+        if index:
+            with self._seek_indexes_lock:
+                self._seek_indexes[cache_key] = index
+                self._seek_indexes.move_to_end(cache_key)
+                while len(self._seek_indexes) > self.max_seek_indexes:
+                    self._seek_indexes.popitem(last=False)
+        return index
+
+    def _build_seek_index(self, cache_key: str, url: str) -> Optional[SeekIndex]:
+        try:
+            complete = self._get_audio_path(cache_key)
+            if complete:
+                with open(complete, 'rb') as f:
+                    def read_file(offset: int, length: int) -> bytes:
+                        f.seek(offset)
+                        return f.read(length)
+                    return build_seek_index(read_file, complete.stat().st_size)
+
+            sparse = self.sparse_audio(cache_key)
+            with sparse.reading():
+                if not self._ensure_sparse_size(sparse, url):
+                    return None
+                size = sparse.size
+
+                def read_range(offset: int, length: int) -> bytes:
+                    return b"".join(self.iter_audio_range(cache_key, url, offset, offset + length))
+                return build_seek_index(read_range, size)
+        except Exception as e:
+            print(f"Error building seek index for {cache_key}: {e}")
             return None
 
     def get_cover(self, item_id: str) -> str:
@@ -232,25 +640,44 @@ class API:
         return None
 
     def _cleanup_cache_if_needed(self):
-        """Clean up old cache files if total size exceeds limit."""
+        """
+        Clean up old cache entries if total size exceeds limit. Whole files
+        and single blocks of partially cached files are evicted alike, least
+        recently used first.
+        """
         try:
-            total_size = sum(f.stat().st_size for f in self.audio_cache_dir.glob('*') if f.is_file())
+            # (mtime, size, name, evict) for every whole file and every cached block
+            entries = []
+            for path in self.audio_cache_dir.iterdir():
+                # Partial files belong to downloads in progress; leave them
+                # alone unless an earlier run left them behind.
+                if path.is_file() and path.suffix in ('.part', '.assembling'):
+                    if time.time() - path.stat().st_mtime > self.stale_partial_seconds:
+                        self._remove_partial(path)
+                elif path.is_file():
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, path.name, path.unlink))
+                elif path.is_dir() and path.suffix == '.blocks':
+                    sparse = self._peek_sparse_audio(path.stem)
+                    for index, block_path in sparse.iter_blocks():
+                        try:
+                            stat = block_path.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, f"{path.name}/{block_path.name}",
+                                        partial(sparse.evict_block, index)))
+
+            total_size = sum(entry[1] for entry in entries)
             max_bytes = self.max_cache_size_gb * 1024 * 1024 * 1024
 
             if total_size > max_bytes:
-                files = sorted(
-                    [f for f in self.audio_cache_dir.glob('*') if f.is_file()],
-                    key = lambda x: x.stat().st_mtime
-                )
-
-                for file in files:
+                for _mtime, size, name, evict in sorted(entries, key=lambda entry: entry[0]):
                     if total_size <= max_bytes * 0.9:
                         break
 
-                    file_size = file.stat().st_size
-                    file.unlink()
-                    total_size -= file_size
-                    print(f"Removed {file.name} from cache to free space.")
+                    evict()
+                    total_size -= size
+                    print(f"Removed {name} from cache to free space.")
         except Exception as e:
             print(f"Error cleaning up cache: {e}")
 
@@ -278,8 +705,7 @@ class API:
                 book.cover_path = self.get_cover(item_id)
                 
                 new_session = Session.from_dict(response)
-                self.sessions.append(new_session)
-                self.current_session = new_session
+                self._open_session(new_session)
 
                 self.start_sync_timer()
                 
@@ -307,6 +733,44 @@ class API:
 
         return
 
+    def _open_session(self, session: Session):
+        """Make `session` the current one and retire the one it replaces."""
+        previous = self.current_session
+        with self._sessions_lock:
+            self.sessions.pop(session.libraryItemId, None)
+            self.sessions[session.libraryItemId] = session
+            # Past the limit (the closer can't reach the server), forget the
+            # oldest; the server expires unclosed sessions on its own.
+            while len(self.sessions) > self.max_open_sessions:
+                self.sessions.popitem(last=False)
+        self.current_session = session
+
+        if previous and previous.id != session.id:
+            self._session_executor().submit(self._close_stale_session, previous)
+
+    def _session_executor(self) -> ThreadPoolExecutor:
+        with self._sessions_lock:
+            if self._session_closer is None:
+                self._session_closer = ThreadPoolExecutor(max_workers=self.session_close_workers,
+                                                          thread_name_prefix="session-closer")
+            return self._session_closer
+
+    def _close_stale_session(self, session: Session):
+        """Close a session another book has replaced."""
+        with self._sessions_lock:
+            if self.sessions.get(session.libraryItemId) is session:
+                del self.sessions[session.libraryItemId]
+        self.close_session(session.id)
+
+    def close_open_sessions(self):
+        """Close every session still open, concurrently; at most max_open_sessions, so shutdown stays short."""
+        with self._sessions_lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            print(f"Closing session for {session.title}")
+        list(self._session_executor().map(lambda session: self.close_session(session.id), sessions))
+
     def sync_session(self, session:Session, player=None):
         """
         Sync the session with the server.
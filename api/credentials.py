@@ -3,9 +3,12 @@ import os
 from pathlib import Path
 import base64
 import hashlib
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable
 
 class CredentialManager:
     """Manages secure storage of credentials."""
@@ -13,6 +16,14 @@ class CredentialManager:
     APP_NAME = "ABS-Client"
     CONFIG_FILE = "config.json"
     CREDS_FILE = "credentials.enc"
+    KEYRING_PROBE_TTL = 7 * 24 * 60 * 60 # Re-probe the keyring weekly
+
+    # Derived Fernet keys, shared by every instance in this process. Keyed by a
+    # hash of (salt, device id) so neither is kept around in the clear.
+    _KEY_CACHE_SIZE = 4
+    _key_cache = OrderedDict()
+    _key_cache_lock = threading.Lock()
+    _device_id = None
 
     def __init__(self, data_dir=None):
         if data_dir:
@@ -26,11 +37,72 @@ class CredentialManager:
         self.creds_path = self.config_dir/self.CREDS_FILE
 
         os.makedirs(self.config_dir, exist_ok=True)
+        self.config_lock = threading.RLock()
         self.config = self._load_config()
-        self.keyring_available = self._check_keyring_available()
 
-        if self.keyring_available and self.creds_path.exists():
-            self._migrate_to_keyring()
+        # Keyring calls can block on D-Bus, so they all run on one
+        # background thread. The capability probe is the first job.
+        self._keyring_queue = queue.Queue()
+        threading.Thread(target=self._keyring_worker, daemon=True).start()
+        self._keyring_probe = self.submit(self._resolve_keyring_available)
+
+        if self.creds_path.exists():
+            self.submit(self._migrate_to_keyring)
+
+    @property
+    def keyring_available(self) -> bool:
+        """Whether the system keyring works. Blocks until the probe finishes."""
+        return self._keyring_probe.result()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run a call that may touch the keyring on the credential thread."""
+        future = Future()
+        self._keyring_queue.put((future, fn, args, kwargs))
+        return future
+
+    def _keyring_worker(self):
+        while True:
+            future, fn, args, kwargs = self._keyring_queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _resolve_keyring_available(self):
+        """Use the cached probe result if it's recent and for the same backend."""
+        backend = self._keyring_backend_name()
+        with self.config_lock:
+            probe = self.config.get("keyring_probe") or {}
+
+        if (probe.get("backend") == backend
+                and time.time() - probe.get("checked_at", 0) < self.KEYRING_PROBE_TTL):
+            return bool(probe.get("available"))
+
+        available = self._check_keyring_available()
+        with self.config_lock:
+            self.config["keyring_probe"] = {
+                "available": available,
+                "backend": backend,
+                "checked_at": time.time(),
+            }
+            self._save_config()
+        return available
+
+    def _invalidate_keyring_probe(self):
+        """Forget the cached probe after a keyring failure so the next launch re-checks."""
+        with self.config_lock:
+            if self.config.pop("keyring_probe", None) is not None:
+                self._save_config()
+
+    def _keyring_backend_name(self):
+        try:
+            import keyring
+            backend = keyring.get_keyring()
+            return f"{type(backend).__module__}.{type(backend).__name__}"
+        except Exception:
+            return ""
 
     def _check_keyring_available(self):
         """Check if keyring is available and working"""
@@ -53,17 +125,40 @@ class CredentialManager:
         if not device_id:
             device_id = self._get_device_id()
 
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            )
-
-        key = base64.urlsafe_b64encode(kdf.derive(device_id.encode()))
+        cache_key = hashlib.sha256(salt + b"\0" + device_id.encode()).digest()
+        cache = CredentialManager._key_cache
+
+        # Derive under the lock so concurrent callers only pay for the KDF once.
+        with CredentialManager._key_cache_lock:
+            key = cache.get(cache_key)
+            if key is not None:
+                cache.move_to_end(cache_key)
+                return key
+
+            # Imported here so startup doesn't load the crypto stack.
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=100000,
+                )
+
+            key = base64.urlsafe_b64encode(kdf.derive(device_id.encode()))
+            cache[cache_key] = key
+            if len(cache) > self._KEY_CACHE_SIZE:
+                cache.popitem(last=False)
         return key
 
     def _get_device_id(self):
+        """Get the device ID, reading it at most once per process."""
+        if CredentialManager._device_id is None:
+            CredentialManager._device_id = self._read_device_id()
+        return CredentialManager._device_id
+
+    def _read_device_id(self):
         """Generate a relatively stable device ID"""
         try:
             if os.name == 'nt': # Windows
@@ -109,8 +204,9 @@ class CredentialManager:
 
     def _save_config(self):
         """Save config to file"""
-        with open(self.config_path, 'w') as f:
-            json.dump(self.config, f)
+        with self.config_lock:
+            with open(self.config_path, 'w') as f:
+                json.dump(self.config, f)
 
     def _encrypt_password(self, password):
         """Encrypt password using Fernet symmetric encryption."""
@@ -122,6 +218,7 @@ class CredentialManager:
         else:
             salt = salt.encode() if isinstance(salt, str) else salt
 
+        from cryptography.fernet import Fernet
         key = self._generate_key(salt.encode() if isinstance(salt, str) else salt, self._get_device_id())
         cipher = Fernet(key)
         encrypted = cipher.encrypt(password.encode())
@@ -130,6 +227,7 @@ class CredentialManager:
     def _decrypt_password(self, encrypted_password):
         """Decrypt password using Fernet symmetric encryption"""
         try:
+            from cryptography.fernet import Fernet
             salt = self.config.get("salt", "").encode()
             key = self._generate_key(salt, self._get_device_id())
             cipher = Fernet(key)
@@ -138,7 +236,7 @@ class CredentialManager:
         except Exception:
             return ""
 
-    def _save_fallback_credentials(self, server_url, username, password):
+    def _save_fallback_credentials(self, server_url, username, password, server_key=None):
         """Save credentials to an encrypted file as fallback"""
         if not server_url or not username or not password:
             return
@@ -151,7 +249,7 @@ class CredentialManager:
             except Exception:
                 creds = {}
 
-        server_key = self._hash_server_url(server_url)
+        server_key = server_key or self._hash_server_url(server_url)
         if server_key not in creds:
             creds[server_key] = {}
 
@@ -160,7 +258,7 @@ class CredentialManager:
         with open(self.creds_path, 'w') as f:
             json.dump(creds, f)
 
-    def _get_fallback_credentials(self, server_url, username):
+    def _get_fallback_credentials(self, server_url, username, server_key=None):
         """Get credentials from encrypted fallback file."""
         if not self.creds_path.exists() or not server_url or not username:
             return None
@@ -169,7 +267,7 @@ class CredentialManager:
             with open(self.creds_path, 'r') as f:
                 creds = json.load(f)
 
-            server_key = self._hash_server_url(server_url)
+            server_key = server_key or self._hash_server_url(server_url)
             if server_key in creds and username in creds[server_key]:
                 encrypted_password = creds[server_key][username]
                 return self._decrypt_password(encrypted_password)
@@ -202,10 +300,11 @@ class CredentialManager:
 
     def save_credentials(self, server_url, username, password, remember=True):
         """Save user credentials securely"""
-        self.config["last_server"] = server_url
-        self.config["remember_me"] = remember
-        self.config["username"] = username if remember else ""
-        self._save_config()
+        with self.config_lock:
+            self.config["last_server"] = server_url
+            self.config["remember_me"] = remember
+            self.config["username"] = username if remember else ""
+            self._save_config()
 
         if remember and password:
             if self.keyring_available:
@@ -214,6 +313,7 @@ class CredentialManager:
                     service_name = f"{self.APP_NAME}-{self._hash_server_url(server_url)}"
                     keyring.set_password(service_name, username, password)
                 except Exception:
+                    self._invalidate_keyring_probe()
                     self._save_fallback_credentials(server_url, username, password)
             else:
                 self._save_fallback_credentials(server_url, username, password)
@@ -232,6 +332,7 @@ class CredentialManager:
                     service_name = f"{self.APP_NAME}-{self._hash_server_url(server_url)}"
                     password = keyring.get_password(service_name, username)
                 except Exception:
+                    self._invalidate_keyring_probe()
                     password = ""
 
             if not password:
@@ -248,6 +349,98 @@ class CredentialManager:
             "remember_me": remember_me
             }
 
+    def save_token(self, server_url, username, token):
+        """Save the server's session token so the next launch can skip login."""
+        if not server_url or not username or not token:
+            return
+
+        if self.keyring_available:
+            try:
+                import keyring
+                keyring.set_password(self._token_service_name(server_url), username, token)
+                return
+            except Exception:
+                self._invalidate_keyring_probe()
+        self._save_fallback_credentials(server_url, username, token,
+                                        server_key=self._token_key(server_url))
+
+    def get_token(self):
+        """Retrieve the saved session token, if "remember me" is on."""
+        server_url = self.config.get("last_server", "")
+        username = self.config.get("username", "")
+        remember_me = self.config.get("remember_me", False)
+
+        token = ""
+        if remember_me and server_url and username:
+            if self.keyring_available:
+                try:
+                    import keyring
+                    token = keyring.get_password(self._token_service_name(server_url), username) or ""
+                except Exception:
+                    self._invalidate_keyring_probe()
+                    token = ""
+
+            if not token:
+                token = self._get_fallback_credentials(server_url, username,
+                                                       server_key=self._token_key(server_url)) or ""
+
+        return {
+            "server_url": server_url,
+            "username": username,
+            "token": token
+            }
+
+    def get_saved_login(self):
+        """
+        Retrieve what's needed to log in without the user.
+        The password is only looked up when there is no saved token.
+        """
+        saved = self.get_token()
+        saved["remember_me"] = self.config.get("remember_me", False)
+        saved["password"] = ""
+        if not saved["token"]:
+            saved["password"] = self.get_credentials()["password"]
+        return saved
+
+    def get_saved_login_async(self, callback: Callable[[dict], None]) -> Future:
+        """Run get_saved_login on the credential thread and pass the result to callback."""
+        def done(future):
+            try:
+                saved = future.result()
+            except Exception as e:
+                print(f"Error reading saved login: {e}")
+                saved = {"server_url": "", "username": "", "token": "", "password": "", "remember_me": False}
+            callback(saved)
+
+        future = self.submit(self.get_saved_login)
+        future.add_done_callback(done)
+        return future
+
+    def save_login(self, server_url, username, password, token, remember=True):
+        """Save (or forget) everything from a successful login."""
+        if remember:
+            self.save_credentials(server_url, username, password, remember=True)
+            self.save_token(server_url, username, token)
+        else:
+            self.clear_token()
+            self.save_credentials(server_url, "", "", remember=False)
+
+    def clear_token(self):
+        """Forget the saved session token, keeping the saved password."""
+        server_url = self.config.get("last_server", "")
+        username = self.config.get("username", "")
+        if not server_url or not username:
+            return
+
+        if self.keyring_available:
+            try:
+                import keyring
+                keyring.delete_password(self._token_service_name(server_url), username)
+            except Exception:
+                pass
+
+        self._remove_fallback_entry(self._token_key(server_url), username)
+
     def clear_credentials(self):
         """Clear saved credentials"""
         server_url = self.config.get("last_server", "")
@@ -261,27 +454,38 @@ class CredentialManager:
             except Exception:
                 pass
 
-        if self.creds_path.exists():
-            try:
-                with open(self.creds_path, 'r') as f:
-                    creds = json.load(f)
-
-                server_key = self._hash_server_url(server_url)
-                if server_key in creds and username in creds[server_key]:
-                    del creds[server_key][username]
-
-                    if not creds[server_key]:
-                        del creds[server_key]
-
-                    with open(self.creds_path, 'w') as f:
-                        json.dump(creds, f)
-            except Exception:
-                pass
+        self.clear_token()
+        self._remove_fallback_entry(self._hash_server_url(server_url), username)
 
         self.config["remember_me"] = False
         self.config["username"] = ""
         self._save_config()
 
+    def _remove_fallback_entry(self, server_key, username):
+        """Remove one user's entry from the encrypted fallback file."""
+        if not self.creds_path.exists():
+            return
+        try:
+            with open(self.creds_path, 'r') as f:
+                creds = json.load(f)
+
+            if server_key in creds and username in creds[server_key]:
+                del creds[server_key][username]
+
+                if not creds[server_key]:
+                    del creds[server_key]
+
+                with open(self.creds_path, 'w') as f:
+                    json.dump(creds, f)
+        except Exception:
+            pass
+
+    def _token_key(self, server_url):
+        return f"{self._hash_server_url(server_url)}-token"
+
+    def _token_service_name(self, server_url):
+        return f"{self.APP_NAME}-{self._token_key(server_url)}"
+
     def _hash_server_url(self, server_url):
         """Create a hash of the server url to use as part of the service name"""
         return base64.urlsafe_b64encode(
@@ -0,0 +1,244 @@
+import os
+import re
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+CHUNK_SIZE = 64 * 1024
+# By upstream file extension, when the server didn't give a mime type
+_CONTENT_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".m4b": "audio/mp4",
+    ".mp4": "audio/mp4",
+    ".aac": "audio/aac",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+}
+DEFAULT_CONTENT_TYPE = "audio/mpeg"
+
+
+def content_type_for(url: str, mime_type: Optional[str] = None) -> str:
+    """The Content-Type to serve a media file with."""
+    if mime_type:
+        return mime_type
+    extension = os.path.splitext(url.split("?", 1)[0])[1].lower()
+    return _CONTENT_TYPES.get(extension, DEFAULT_CONTENT_TYPE)
+
+
+class ProxyEntry:
+    """One media file behind the proxy, and where it lives upstream."""
+
+    def __init__(self, cache_key: str, url: str, content_type: str = DEFAULT_CONTENT_TYPE):
+        self.cache_key = cache_key
+        self.url = url
+        self.content_type = content_type
+
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # mpv drops connections whenever it seeks or switches files; only
+        # report real failures.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MediaProxy:
+    """
+    Loopback HTTP server that mpv streams audio from.
+
+    Ranges are served from the audio cache when present. Missing blocks are
+    fetched upstream through the API's httpx client (with its auth) and kept
+    in the file's block cache (see API.iter_audio_range). mpv only ever sees
+    an unauthenticated 127.0.0.1 URL.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self.entries: Dict[str, ProxyEntry] = {}
+        self.entries_lock = threading.Lock()
+        # Unguessable path prefix, so other local users can't read through the proxy.
+        self.secret = secrets.token_urlsafe(16)
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.server:
+            return
+
+        proxy = self
+
+        class Handler(ProxyRequestHandler):
+            pass
+        Handler.proxy = proxy
+
+        self.server = ProxyServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def url_for(self, cache_key: str, url: str, mime_type: Optional[str] = None) -> str:
+        """Register a media file and return the local URL to play it from."""
+        self.start()
+        content_type = content_type_for(url, mime_type)
+        with self.entries_lock:
+            entry = self.entries.get(cache_key)
+            if entry is None or entry.url != url or entry.content_type != content_type:
+                self.entries[cache_key] = ProxyEntry(cache_key, url, content_type)
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{self.secret}/{cache_key}.mp3"
+
+    def serves(self, url: str) -> bool:
+        """Whether `url` is one of this proxy's URLs."""
+        if not self.server:
+            return False
+        host, port = self.server.server_address[:2]
+        return url.startswith(f"http://{host}:{port}/{self.secret}/")
+
+    def entry_for_path(self, path: str) -> Optional[ProxyEntry]:
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 2 or parts[0] != self.secret or not parts[1].endswith(".mp3"):
+            return None
+        with self.entries_lock:
+            return self.entries.get(parts[1][:-len(".mp3")])
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    proxy: MediaProxy = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # mpv hung up between requests
+            pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool):
+        entry = self.proxy.entry_for_path(self.path)
+        if entry is None:
+            self.send_error(404)
+            return
+
+        cached = self.proxy.api._get_audio_path(entry.cache_key)
+        try:
+            if cached:
+                self._serve_file(entry, cached, send_body)
+            else:
+                self._serve_entry(entry, send_body)
+        except ConnectionError:
+            # mpv dropped the connection, usually to seek elsewhere.
+            self.close_connection = True
+        except Exception as e:
+            # Headers are usually already out; all we can do is cut the response short.
+            print(f"Proxy error serving {entry.cache_key}: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                self.proxy.api._check_unauthorized(e.response)
+            self.close_connection = True
+
+    def _requested_range(self, size: int) -> Optional[Tuple[int, int, bool]]:
+        """
+        The inclusive byte range to send of a `size`-byte file, and whether
+        it's a partial (206) response; None if the range can't be satisfied.
+        A missing or malformed Range header gets the whole file.
+        """
+        match = _RANGE.fullmatch(self.headers.get("Range", "").strip())
+        if not match or not (match.group(1) or match.group(2)):
+            return 0, size - 1, False
+        first, last = match.groups()
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if not length or not size:
+                return None
+            return max(size - length, 0), size - 1, True
+
+        start = int(first)
+        end = size - 1 if not last else min(int(last), size - 1)
+        if start >= size or end < start:
+            return None
+        return start, end, True
+
+    def _send_headers(self, entry: ProxyEntry, start: int, end: int, size: int, partial: bool):
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+    def _send_unsatisfiable(self, size: int):
+        self.send_response(416)
+        self.send_header("Content-Range", f"bytes */{size}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve_file(self, entry: ProxyEntry, path: Path, send_body: bool):
+        size = path.stat().st_size
+        requested = self._requested_range(size)
+        if requested is None:
+            self._send_unsatisfiable(size)
+            return
+        start, end, partial = requested
+        self._send_headers(entry, start, end, size, partial)
+        if not send_body:
+            return
+
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                self.wfile.write(data)
+                remaining -= len(data)
+
+    def _serve_entry(self, entry: ProxyEntry, send_body: bool):
+        api = self.proxy.api
+        sparse = api.sparse_audio(entry.cache_key)
+        # Held until the body is out, so a finishing download can't delete
+        # the blocks mid-response; iter_audio_range moves over to the whole
+        # file once it exists.
+        with sparse.reading():
+            if not api._ensure_sparse_size(sparse, entry.url):
+                self.send_error(502)
+                return
+            size = sparse.size
+            requested = self._requested_range(size)
+            if requested is None:
+                self._send_unsatisfiable(size)
+                return
+            start, end, partial = requested
+            self._send_headers(entry, start, end, size, partial)
+            if not send_body:
+                return
+
+            for data in api.iter_audio_range(entry.cache_key, entry.url, start, end + 1):
+                self.wfile.write(data)
+
@@ -26,6 +26,7 @@ class AudioFile:
     duration: float
     url: str
     bytes: int
+    mime_type: str = ""
 
     @classmethod
     def from_dict(cls, data: dict) -> "AudioFile":
@@ -35,7 +36,8 @@ class AudioFile:
             start_offset = float(data.get("start_offset", 0.0)),
             duration = float(data.get("duration", 0.0)),
             url = data.get("contentUrl", ""),
-            bytes = _metadata.get("bytes", 0)
+            bytes = _metadata.get("bytes", 0),
+            mime_type = data.get("mimeType", ""),
             )
 
 @dataclass
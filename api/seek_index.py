@@ -0,0 +1,274 @@
+import json
+import os
+import struct
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# read(offset, length) -> bytes; may return fewer bytes at the end of the file
+Reader = Callable[[int, int], bytes]
+
+_MP3_BITRATES = {
+    # (MPEG-1, layer III) and (MPEG-2/2.5, layer III), kbit/s
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+_MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+# Containers whose children we descend into when looking for the sample tables
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+# Keep at most one point per this many seconds
+_MIN_POINT_SPACING = 1.0
+
+
+class SeekIndex:
+    """
+    Maps playback time to byte offsets in one audio file, as a sorted list
+    of (seconds, offset) points with linear interpolation between them.
+    """
+
+    def __init__(self, duration: float, points: List[Tuple[float, int]]):
+        self.duration = duration
+        self.points = sorted(points)
+        self._times = [time for time, _offset in self.points]
+
+    def byte_offset(self, seconds: float) -> int:
+        """Byte offset to start reading at to play from `seconds`."""
+        if not self.points:
+            return 0
+        index = bisect_right(self._times, seconds) - 1
+        if index < 0:
+            return self.points[0][1]
+        if index >= len(self.points) - 1:
+            return self.points[-1][1]
+
+        (time, offset), (next_time, next_offset) = self.points[index], self.points[index + 1]
+        if next_time <= time:
+            return offset
+        return int(offset + (next_offset - offset) * (seconds - time) / (next_time - time))
+
+    def to_dict(self) -> Dict:
+        return {"duration": self.duration, "points": self.points}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SeekIndex':
+        return cls(data["duration"], [(time, offset) for time, offset in data["points"]])
+
+    def save(self, path: Path):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['SeekIndex']:
+        try:
+            with open(path, 'r') as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def build_seek_index(read: Reader, size: int) -> Optional[SeekIndex]:
+    """Build a seek index for an MP3 or MP4/M4B file, or None if it can't be parsed."""
+    head = read(0, 12)
+    if head[4:8] == b"ftyp":
+        return _parse_mp4(read, size)
+    return _parse_mp3(read, size)
+
+
+def _thin(points: List[Tuple[float, int]]) -> List[Tuple[float, int]]:
+    thinned = []
+    for point in points:
+        if not thinned or point[0] - thinned[-1][0] >= _MIN_POINT_SPACING:
+            thinned.append(point)
+    if points and thinned[-1] != points[-1]:
+        thinned.append(points[-1])
+    return thinned
+
+
+# MP3
+
+def _parse_mp3(read: Reader, size: int) -> Optional[SeekIndex]:
+    audio_start = 0
+    header = read(0, 10)
+    if header[:3] == b"ID3" and len(header) == 10:
+        # Syncsafe tag size, plus the optional 10-byte footer
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    data = read(audio_start, 4096)
+    sync = next((i for i in range(len(data) - 3) if data[i] == 0xFF and data[i + 1] & 0xE0 == 0xE0), None)
+    if sync is None:
+        return None
+    frame_start = audio_start + sync
+    frame = data[sync:]
+
+    version_bits = (frame[1] >> 3) & 0x03
+    version = {3: 1, 2: 2, 0: 25}.get(version_bits)
+    bitrate_index = frame[2] >> 4
+    rate_index = (frame[2] >> 2) & 0x03
+    if version is None or rate_index == 3 or (frame[1] >> 1) & 0x03 != 1:
+        # Only MPEG audio layer III
+        return None
+
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    samples_per_frame = 1152 if version == 1 else 576
+    mono = (frame[3] >> 6) == 3
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+
+    xing_offset = 4 + side_info
+    if frame[xing_offset:xing_offset + 4] in (b"Xing", b"Info"):
+        return _parse_xing(frame[xing_offset:], frame_start, size, sample_rate, samples_per_frame)
+    if frame[36:40] == b"VBRI":
+        return _parse_vbri(frame[36:], frame_start, size, sample_rate, samples_per_frame)
+
+    # Constant bitrate: time is proportional to bytes.
+    if not bitrate:
+        return None
+    duration = (size - frame_start) * 8 / bitrate
+    return SeekIndex(duration, [(0.0, frame_start), (duration, size)])
+
+
+def _parse_xing(tag: bytes, frame_start: int, size: int, sample_rate: int, samples_per_frame: int) -> Optional[SeekIndex]:
+    flags = struct.unpack(">I", tag[4:8])[0]
+    position = 8
+    frames = total_bytes = None
+    toc = None
+    if flags & 0x1:
+        frames = struct.unpack(">I", tag[position:position + 4])[0]
+        position += 4
+    if flags & 0x2:
+        total_bytes = struct.unpack(">I", tag[position:position + 4])[0]
+        position += 4
+    if flags & 0x4:
+        toc = tag[position:position + 100]
+
+    if not frames:
+        return None
+    duration = frames * samples_per_frame / sample_rate
+    total_bytes = total_bytes or (size - frame_start)
+
+    if not toc or len(toc) < 100:
+        return SeekIndex(duration, [(0.0, frame_start), (duration, frame_start + total_bytes)])
+
+    # TOC entry i is the byte position (in 1/256ths) of i percent of the duration.
+    points = [(duration * i / 100, frame_start + int(toc[i] / 256 * total_bytes)) for i in range(100)]
+    points.append((duration, frame_start + total_bytes))
+    return SeekIndex(duration, points)
+
+
+def _parse_vbri(tag: bytes, frame_start: int, size: int, sample_rate: int, samples_per_frame: int) -> Optional[SeekIndex]:
+    if len(tag) < 26:
+        return None
+    total_bytes, frames, entries, scale, entry_size, frames_per_entry = struct.unpack(">IIHHHH", tag[10:26])
+    duration = frames * samples_per_frame / sample_rate
+    seconds_per_entry = duration * frames_per_entry / frames if frames else 0
+
+    points = [(0.0, frame_start)]
+    offset = frame_start
+    table = tag[26:26 + entries * entry_size]
+    for i in range(len(table) // entry_size):
+        delta = int.from_bytes(table[i * entry_size:(i + 1) * entry_size], "big") * scale
+        offset += delta
+        points.append((min(seconds_per_entry * (i + 1), duration), offset))
+    points.append((duration, min(frame_start + total_bytes, size)))
+    return SeekIndex(duration, points)
+
+
+# MP4 / M4B
+
+def _iter_boxes(read: Reader, start: int, end: int):
+    """Yield (type, payload offset, box end) for the boxes between start and end."""
+    position = start
+    while position + 8 <= end:
+        header = read(position, 16)
+        if len(header) < 8:
+            return
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = end - position
+        if box_size < header_size:
+            return
+        yield box_type, position + header_size, position + box_size
+        position += box_size
+
+
+def _find_sound_tables(read: Reader, start: int, end: int, found: Dict[bytes, bytes], path: Tuple[bytes, ...] = ()):
+    """Collect the sample tables of the first sound track into `found`."""
+    for box_type, payload, box_end in _iter_boxes(read, start, end):
+        if box_type == b"trak":
+            tables: Dict[bytes, bytes] = {}
+            _find_sound_tables(read, payload, box_end, tables, path + (box_type,))
+            if tables.get(b"hdlr", b"")[8:12] == b"soun" and b"mdhd" in tables:
+                found.update(tables)
+                return
+        elif box_type in _MP4_CONTAINERS:
+            _find_sound_tables(read, payload, box_end, found, path + (box_type,))
+            if found:
+                return
+        elif box_type in (b"hdlr", b"mdhd", b"stts", b"stsc", b"stco", b"co64") and b"trak" in path:
+            found[box_type] = read(payload, box_end - payload)
+
+
+def _parse_mp4(read: Reader, size: int) -> Optional[SeekIndex]:
+    tables: Dict[bytes, bytes] = {}
+    _find_sound_tables(read, 0, size, tables)
+    if not all(key in tables for key in (b"mdhd", b"stts", b"stsc")) or not (b"stco" in tables or b"co64" in tables):
+        return None
+
+    mdhd = tables[b"mdhd"]
+    if mdhd[0] == 1:
+        timescale, duration_units = struct.unpack(">IQ", mdhd[20:32])
+    else:
+        timescale, duration_units = struct.unpack(">II", mdhd[12:20])
+    if not timescale:
+        return None
+
+    # Chunk offsets
+    if b"co64" in tables:
+        count = struct.unpack(">I", tables[b"co64"][4:8])[0]
+        chunk_offsets = list(struct.unpack(f">{count}Q", tables[b"co64"][8:8 + count * 8]))
+    else:
+        count = struct.unpack(">I", tables[b"stco"][4:8])[0]
+        chunk_offsets = list(struct.unpack(f">{count}I", tables[b"stco"][8:8 + count * 4]))
+
+    # Samples per chunk, as runs of (first chunk, samples per chunk)
+    stsc = tables[b"stsc"]
+    runs = [struct.unpack(">III", stsc[8 + i * 12:20 + i * 12])[:2] for i in range(struct.unpack(">I", stsc[4:8])[0])]
+
+    # Sample durations, as runs of (count, delta)
+    stts = tables[b"stts"]
+    durations = [struct.unpack(">II", stts[8 + i * 8:16 + i * 8]) for i in range(struct.unpack(">I", stts[4:8])[0])]
+
+    points = []
+    time_units = 0
+    run_index = 0
+    duration_index, duration_left = 0, (durations[0][0] if durations else 0)
+    for chunk_number, offset in enumerate(chunk_offsets, start=1):
+        while run_index + 1 < len(runs) and runs[run_index + 1][0] <= chunk_number:
+            run_index += 1
+        points.append((time_units / timescale, offset))
+
+        # Advance the clock by this chunk's samples.
+        samples = runs[run_index][1] if runs else 0
+        while samples and duration_index < len(durations):
+            step = min(samples, duration_left)
+            time_units += step * durations[duration_index][1]
+            samples -= step
+            duration_left -= step
+            if not duration_left:
+                duration_index += 1
+                duration_left = durations[duration_index][0] if duration_index < len(durations) else 0
+
+    duration = duration_units / timescale
+    points.append((duration, size))
+    return SeekIndex(duration, _thin(points))
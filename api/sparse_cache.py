@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 256 * 1024
+
+
+class SparseAudioFile:
+    """
+    A partially cached audio file.
+
+    The file is split into fixed-size blocks, each stored in its own file
+    under `directory`, with a bitmap of which blocks are present persisted
+    next to them. Any block can be fetched, read or evicted on its own.
+
+    Readers hold the file open with `reading()`; `remove` waits for the
+    last of them before deleting anything.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: Path, block_size: int = BLOCK_SIZE):
+        self.directory = directory
+        self.block_size = block_size
+        self.size: Optional[int] = None
+        self.bitmap = bytearray()
+        self.lock = threading.RLock()
+        self.readers = 0
+        self.removal_pending = False
+        self._load()
+
+    @property
+    def block_count(self) -> int:
+        if self.size is None:
+            return 0
+        return (self.size + self.block_size - 1) // self.block_size
+
+    def _load(self):
+        try:
+            with open(self.directory / self.INDEX_NAME, 'r') as f:
+                index = json.load(f)
+            if index.get("block_size") == self.block_size:
+                self.size = index["size"]
+                self.bitmap = bytearray.fromhex(index["bitmap"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.directory / self.INDEX_NAME
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"size": self.size, "block_size": self.block_size, "bitmap": self.bitmap.hex()}, f)
+        os.replace(tmp_path, index_path)
+
+    def set_size(self, size: int):
+        """Record the file's total size; a different size invalidates every block."""
+        with self.lock:
+            if self.size == size:
+                return
+            self.size = size
+            self.bitmap = bytearray((self.block_count + 7) // 8)
+            for block_path in self.directory.glob("*.blk"):
+                block_path.unlink()
+            self._save()
+
+    def block_range(self, index: int) -> Tuple[int, int]:
+        """Byte range [start, end) covered by a block."""
+        if self.size is None:
+            raise ValueError(f"Size of {self.directory.name} is unknown or it was removed")
+        start = index * self.block_size
+        return start, min(start + self.block_size, self.size)
+
+    def block_path(self, index: int) -> Path:
+        return self.directory / f"{index:06d}.blk"
+
+    def has_block(self, index: int) -> bool:
+        with self.lock:
+            return 0 <= index < self.block_count and bool(self.bitmap[index // 8] & (1 << (index % 8)))
+
+    def present_blocks(self) -> List[int]:
+        with self.lock:
+            return [index for index in range(self.block_count) if self.has_block(index)]
+
+    def missing_run(self, first: int, last: int) -> Optional[Tuple[int, int]]:
+        """The first run of missing blocks within [first, last], as (first, last) inclusive."""
+        with self.lock:
+            start = next((index for index in range(first, last + 1) if not self.has_block(index)), None)
+            if start is None:
+                return None
+            end = start
+            while end + 1 <= last and not self.has_block(end + 1):
+                end += 1
+            return start, end
+
+    def is_complete(self) -> bool:
+        with self.lock:
+            return self.size is not None and all(self.has_block(index) for index in range(self.block_count))
+
+    def write_block(self, index: int, data: bytes):
+        start, end = self.block_range(index)
+        if len(data) != end - start:
+            raise ValueError(f"Block {index} should be {end - start} bytes, got {len(data)}")
+
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.block_path(index).with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.block_path(index))
+            self.bitmap[index // 8] |= 1 << (index % 8)
+            self._save()
+
+    def read_block(self, index: int) -> bytes:
+        """Read a present block; raises FileNotFoundError if it's gone (evicted or promoted)."""
+        block_path = self.block_path(index)
+        with open(block_path, 'rb') as f:
+            data = f.read()
+        # Eviction is least-recently-used by mtime.
+        os.utime(block_path)
+        return data
+
+    def evict_block(self, index: int):
+        with self.lock:
+            if not self.has_block(index):
+                return
+            self.bitmap[index // 8] &= ~(1 << (index % 8)) & 0xFF
+            self._save()
+            self.block_path(index).unlink(missing_ok=True)
+
+    def iter_blocks(self) -> Iterator[Tuple[int, Path]]:
+        for index in self.present_blocks():
+            yield index, self.block_path(index)
+
+    def assemble(self, destination: Path):
+        """Write the complete file to `destination`."""
+        tmp_path = destination.with_name(destination.name + ".assembling")
+        with open(tmp_path, 'wb') as out:
+            for index in range(self.block_count):
+                out.write(self.read_block(index))
+        os.replace(tmp_path, destination)
+
+    @contextmanager
+    def reading(self):
+        """Keep the blocks on disk while the caller reads or fills them."""
+        with self.lock:
+            self.readers += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.readers -= 1
+                if not self.readers and self.removal_pending:
+                    self._remove_now()
+
+    def remove(self):
+        """Delete the blocks, now or once the last reader is done."""
+        with self.lock:
+            if self.readers:
+                self.removal_pending = True
+            else:
+                self._remove_now()
+
+    def _remove_now(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.size = None
+        self.bitmap = bytearray()
+        self.removal_pending = False
@@ -1,29 +1,39 @@
+import os
 import sys
-from PyQt6.QtCore import QSize, QTimer
-from PyQt6.QtWidgets import QApplication, QStackedWidget
 import time
+_STARTUP_TIME = time.perf_counter()
+
+from PyQt6.QtCore import QSize, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStackedWidget
 
 from api.api import API
 from api.credentials import CredentialManager
 from .LoginScreen import LoginScreen
-from .HomeScreen import HomeScreen
-from .Player import Player
-from .Player_UI import PlayerBar
+from .HomeScreen import HomeScreen, HomeLoader
+from .Theme import apply_theme
+
+# Modules kept off the startup path; reported by ABS_CLIENT_PROFILE_STARTUP.
+DEFERRED_MODULES = ["mpv", "cryptography", "keyring", "app.Player_UI"]
 
 class AudiobookApp(QStackedWidget):
     """Main application window."""
+
+    # Emitted (possibly from a worker thread) with the token the server rejected.
+    session_expired = pyqtSignal(str)
     
     def __init__(self):
         super().__init__()
         self.api = API("")
-        self.player = Player(self.api)
         self.creds = CredentialManager(self.api.data_dir)
-        self.api.set_player(self.player)
+        self.api.set_unauthorized_callback(self.session_expired.emit)
+        self.session_expired.connect(self.handle_session_expired)
 
-        self.player_bar = PlayerBar(self.player, self.api, self)
-        self.player_bar.hide()
+        self.login_screen = None
+        self.home_screen = None
 
-        self.player.set_player_bar(self.player_bar)
+        # mpv and the player UI are built on first login, see _ensure_player.
+        self.player = None
+        self.player_bar = None
 
         self.setWindowTitle("AudiobookShelf Client")
         self.setMinimumSize(QSize(1000,800))
@@ -34,21 +44,81 @@ class AudiobookApp(QStackedWidget):
         app = QApplication.instance()
         app.aboutToQuit.connect(self.cleanup)
 
-    def try_auto_login(self):
-        creds = self.creds.get_credentials()
+    def try_token_login(self, saved) -> bool:
+        """
+        Reuse the token saved by the last session instead of logging in.
+        The token is validated by the first real request; a 401 sends us
+        back through handle_session_expired to a password login.
+        """
+        if not saved["server_url"] or not saved["token"]:
+            return False
+
+        self.api.set_base_url(saved["server_url"])
+        self.api.set_token(saved["token"])
+        self.home_loader.prefetch()
+        self.handle_login_success(saved["token"])
+        return True
+
+    def handle_session_expired(self, token):
+        """Fall back to a password login when the server rejects our token."""
+        if token != self.api.token:
+            # Already handled, or a stale response from a previous session.
+            return
+
+        print("Session token rejected, logging in again.")
+        self.api.set_token(None)
+        self.creds.submit(self.creds.clear_token)
+
+        if self.home_screen:
+            self.home_screen.loader.shutdown()
+            self.removeWidget(self.home_screen)
+            self.home_screen = None
+        if self.player_bar:
+            self.player_bar.hide()
+        self.show_login()
+
+    def try_auto_login(self, saved):
+        if not saved["remember_me"]:
+            return
+        if self.try_token_login(saved):
+            return
 
-        if creds["remember_me"] and creds["server_url"] and creds["username"] and creds["password"]:
+        if saved["server_url"] and saved["username"] and saved["password"]:
             QTimer.singleShot(20, self.login_screen.attempt_login)
 
     def show_login(self):
-        self.login_screen = LoginScreen(self.handle_login_success, self.api, self.creds)
+        # A fresh screen per login, bound to the current API; drop the last one.
+        if self.login_screen:
+            self.removeWidget(self.login_screen)
+            self.login_screen.deleteLater()
+            self.login_screen = None
+
+        self.home_loader = HomeLoader(self.api)
+        self.login_screen = LoginScreen(self.handle_login_success, self.api, self.creds,
+                                        on_token=lambda token: self.home_loader.prefetch())
+        self.login_screen.saved_login_loaded.connect(self.try_auto_login)
 
         self.addWidget(self.login_screen)
         self.setCurrentWidget(self.login_screen)
-        QTimer.singleShot(30, self.try_auto_login)
+
+    def _ensure_player(self):
+        """Create the mpv player and its UI the first time they're needed."""
+        if self.player:
+            return
+
+        from .Player import Player
+        from .Player_UI import PlayerBar
+
+        self.player = Player(self.api)
+        self.api.set_player(self.player)
+
+        self.player_bar = PlayerBar(self.player, self.api, self)
+        self.player_bar.hide()
+        self.player.set_player_bar(self.player_bar)
 
     def handle_login_success(self, token):
-        self.home_screen = HomeScreen(self.api, self.player, self)
+        self._ensure_player()
+        self.home_screen = HomeScreen(self.api, self.player, self, self.home_loader)
         self.addWidget(self.home_screen)
         self.setCurrentWidget(self.home_screen)
 
@@ -62,47 +132,62 @@ class AudiobookApp(QStackedWidget):
         self.update_player_bar_position()
 
     def update_player_bar_position(self):
-        if self.player_bar.isVisible():
+        if self.player_bar and self.player_bar.isVisible():
             self.player_bar.setGeometry(0, self.height() - self.player_bar.height(), self.width(), self.player_bar.height())
 
     def switch_page(self, page):
         self.setCurrentWidget(page)
-        self.player_bar.raise_()
+        if self.player_bar:
+            self.player_bar.raise_()
         self.update_player_bar_position()
 
     def logout(self):
+        self.creds.submit(self.creds.clear_token)
         self.api = API("")
-        self.player = Player(self.api)
-        self.player_bar.hide()
-        self.player_bar = PlayerBar(self.player, self.api, self)
+        self.api.set_unauthorized_callback(self.session_expired.emit)
+        # Rebuilt on the next login by _ensure_player.
+        if self.player_bar:
+            self.player_bar.hide()
+        self.player = None
+        self.player_bar = None
         self.removeWidget(self.home_screen)
-        self.removeWidget(self.login_screen)
         self.home_screen = None
         self.show_login()
 
     def cleanup(self):
-        self.player.stop()
+        if self.player:
+            self.player.stop()
         if hasattr(self, "api") and self.api:
             if self.api.current_session:
                 try:
                     self.api.sync_session(self.api.current_session, self.player)
                 except Exception as e:
                     print(f"Error syncing current session: {e}")
-            for session in self.api.sessions:
-                try:
-                    print(f"Closing session for {session.title}")
-                    self.api.close_session(session.id)
-                except Exception as e:
-                    print(f"Error closing session: {e}")
+            try:
+                # Stale sessions were closed in the background; this is
+                # the current one plus any the closer hasn't reached yet.
+                self.api.close_open_sessions()
+            except Exception as e:
+                print(f"Error closing sessions: {e}")
+
+def report_startup():
+    """Print time to first paint and which deferred modules were loaded by then."""
+    elapsed = (time.perf_counter() - _STARTUP_TIME) * 1000
+    print(f"Startup: first paint after {elapsed:.0f} ms")
+    for name in DEFERRED_MODULES:
+        state = "loaded" if name in sys.modules else "deferred"
+        print(f"  {name}: {state}")
+    print("For a per-module breakdown run: python -X importtime -m app.App")
 
 def main():
     app = QApplication(sys.argv)
+    apply_theme(app)
     window = AudiobookApp()
     window.show()
+    if os.environ.get("ABS_CLIENT_PROFILE_STARTUP"):
+        # Runs once the event loop has processed the first paint.
+        QTimer.singleShot(0, report_startup)
     sys.exit(app.exec())
         
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = AudiobookApp()
-    window.show()
-    sys.exit(app.exec())
+    main()
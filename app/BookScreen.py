@@ -1,4 +1,3 @@
-import importlib.resources
 from PyQt6.QtCore import QObject, Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import QFrame, QHBoxLayout, QLabel, QProgressBar, QProgressDialog, QPushButton, QSizePolicy, QSpacerItem, QTextEdit, QVBoxLayout, QWidget, QMessageBox
@@ -46,14 +45,7 @@ class BookLoader(QObject):
 class BookScreen(QWidget):
     def __init__(self, book: Book, player: Player, api: API, back_callback):
         super().__init__()
-        ## with open('styles/book_detail.qss') as f:
-        ##     style = f.read()
-        ##     self.setStyleSheet(style)
-        with importlib.resources.path('styles', 'book_detail.qss') as style_path:
-            f = open(style_path, 'r')
-            style = f.read()
-            self.setStyleSheet(style)
-            f.close()        
+        # Styled by the application theme, see app/Theme.py
         self.setObjectName("bookScreen")
         self.api = api
         self.player = player
@@ -1,7 +1,10 @@
 import os
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from PyQt6 import QtGui
-from PyQt6.QtCore import QEvent, QPoint, Qt
+from PyQt6.QtCore import QEvent, QObject, QPoint, Qt, pyqtSignal
 from PyQt6.QtGui import QAction, QPixmap, QShowEvent
 from PyQt6.QtWidgets import (
     QFrame,
@@ -19,25 +22,191 @@ from PyQt6.QtWidgets import (
     QLineEdit, 
     QComboBox
 )
-import importlib.resources
 from api.api import API
 from api.book import Book
 from app.Player import Player
 from .BookScreen import BookScreen
 
 
+class HomeLoader(QObject):
+    """
+    Runs the home screen's network stages on a small thread pool.
+
+    Libraries and in-progress items are independent and load in parallel.
+    Library items and their covers are tagged with a generation number, so
+    results for a library the user has already switched away from are dropped
+    and any covers still queued for it are cancelled.
+
+    The loader can be created before the home screen exists: `prefetch` starts
+    the first requests as soon as a token is available, and the later `load_*`
+    calls pick up those in-flight results instead of asking the server again.
+    """
+    libraries_loaded = pyqtSignal(object)
+    books_loaded = pyqtSignal(int, object)
+    cover_loaded = pyqtSignal(int, str, str)
+    in_progress_loaded = pyqtSignal(object)
+    loading_failed = pyqtSignal(str, str)
+
+    def __init__(self, api: API, max_workers: int = 4):
+        super().__init__()
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="home-loader")
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._cover_futures: List[Future] = []
+        self._prefetched: Dict[Tuple[str, str], Future] = {}
+
+    def prefetch(self):
+        """
+        Start fetching libraries, in-progress items and the first library's items.
+
+        Safe to call from any thread; it only queues work.
+        """
+        with self._lock:
+            self._prefetched[("libraries", "")] = self.executor.submit(self._prefetch_libraries)
+            self._prefetched[("in_progress", "")] = self.executor.submit(self._collect_in_progress)
+
+    def load_libraries(self):
+        """Fetch the library list in the background."""
+        future = self._take_prefetched("libraries")
+        if future is None:
+            future = self.executor.submit(self.api.libraries)
+        future.add_done_callback(self._on_libraries_done)
+
+    def load_in_progress(self):
+        """Fetch the user's in-progress books in the background."""
+        future = self._take_prefetched("in_progress")
+        if future is None:
+            future = self.executor.submit(self._collect_in_progress)
+        future.add_done_callback(self._on_in_progress_done)
+
+    def load_books(self, library_id: str) -> int:
+        """
+        Fetch items for a library, cancelling work for any previous library.
+
+        Returns:
+            The generation number attached to the resulting signals
+        """
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            self._cancel_covers()
+
+        future = self._take_prefetched("books", library_id)
+        if future is None:
+            future = self.executor.submit(self.api.library_items, library_id)
+        future.add_done_callback(lambda f: self._on_books_done(f, generation))
+        return generation
+
+    def cancel(self):
+        """Drop the results of any in-flight book or cover loads."""
+        with self._lock:
+            self.generation += 1
+            self._cancel_covers()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _is_stale(self, generation: int) -> bool:
+        return generation != self.generation
+
+    def _take_prefetched(self, stage: str, key: str = "") -> Optional[Future]:
+        with self._lock:
+            return self._prefetched.pop((stage, key), None)
+
+    def _cancel_covers(self):
+        for future in self._cover_futures:
+            future.cancel()
+        self._cover_futures = []
+
+    def _prefetch_libraries(self):
+        libraries = self.api.libraries()
+        # Queue the first library's items before anyone can see the result,
+        # so load_books always finds them.
+        if libraries:
+            first_library = list(libraries.values())[0]
+            with self._lock:
+                self._prefetched[("books", first_library.id)] = self.executor.submit(
+                    self.api.library_items, first_library.id
+                )
+        return libraries
+
+    def _on_libraries_done(self, future: Future):
+        try:
+            self.libraries_loaded.emit(future.result())
+        except Exception as e:
+            print(f"Error loading libraries: {e}")
+            self.loading_failed.emit("libraries", str(e))
+
+    def _on_books_done(self, future: Future, generation: int):
+        if self._is_stale(generation) or future.cancelled():
+            return
+        try:
+            books = future.result()
+        except Exception as e:
+            print("Error loading books: ", e)
+            if not self._is_stale(generation):
+                self.loading_failed.emit("books", str(e))
+            return
+
+        if self._is_stale(generation):
+            return
+        self.books_loaded.emit(generation, books)
+
+        with self._lock:
+            if self._is_stale(generation):
+                return
+            for book in books:
+                if not getattr(book, 'cover_path', None):
+                    self._cover_futures.append(
+                        self.executor.submit(self._fetch_cover, book.id, generation)
+                    )
+
+    def _fetch_cover(self, book_id: str, generation: int):
+        if self._is_stale(generation):
+            return
+        cover_path = self.api.download_cover(book_id)
+        if cover_path and not self._is_stale(generation):
+            self.cover_loaded.emit(generation, book_id, cover_path)
+
+    def _collect_in_progress(self):
+        try:
+            in_progress_ids = self.api.in_progress()
+        except Exception as e:
+            print(f"Error fetching in-progress books: {e}")
+            in_progress_ids = []
+
+        in_progress_books = []
+        for book_id in in_progress_ids or []:
+            try:
+                book = self.api.book_details(book_id)
+                if book:
+                    in_progress_books.append(book)
+            except Exception as e:
+                print(f"Error fetching in-progress book {book_id}: {e}")
+        return in_progress_books
+
+    def _on_in_progress_done(self, future: Future):
+        try:
+            self.in_progress_loaded.emit(future.result())
+        except Exception as e:
+            print(f"Error fetching in-progress books: {e}")
+
+
 class HomeScreen(QWidget):
     """
     Home screen widget for the AudiobookShelf client application.
     Displays library selection, search functionality, and the main content area.
     """
     
-    def __init__(self, api: API, player: Player, parent: QStackedWidget):
+    def __init__(self, api: API, player: Player, parent: QStackedWidget, loader: Optional[HomeLoader] = None):
         """
         Initialize the home screen with API connection.
         
         Args:
             api: API object for communicating with the AudiobookShelf server
+            loader: Loader that may already be prefetching home data
         """
         super().__init__()
         self.parent_widget = parent
@@ -47,12 +216,17 @@ class HomeScreen(QWidget):
         self.current_items = []
         self.in_progress_items = []
         self.player = player
+        self._cover_labels: Dict[str, QLabel] = {}
+
+        self.loader = loader or HomeLoader(api)
+        self.loader.libraries_loaded.connect(self._on_libraries_loaded)
+        self.loader.books_loaded.connect(self._on_books_loaded)
+        self.loader.cover_loaded.connect(self._on_cover_loaded)
+        self.loader.in_progress_loaded.connect(self._on_in_progress_loaded)
+        self.loader.loading_failed.connect(self._on_loading_failed)
 
-        with importlib.resources.path('styles', 'home.qss') as style_path:
-            f = open(style_path, 'r')
-            style = f.read()
-            self.setStyleSheet(style)
-            f.close()
+        # Styled by the application theme, see app/Theme.py
+        self.setObjectName("homeScreen")
         
         # Setup UI components
         self._setup_ui()
@@ -79,7 +253,8 @@ class HomeScreen(QWidget):
             event: The show event
         """
         super().showEvent(a0)
-        self._fetch_libraries()
+        if not self.libraries:
+            self._fetch_libraries()
         self._fetch_in_progress_books()
 
     def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
@@ -171,7 +346,8 @@ class HomeScreen(QWidget):
 
         menu.popup(self.menu_button.mapToGlobal(QPoint(0, self.menu_button.height())))
 
-    def _adjust_grid_layout(self):
+    def _adjust_grid_layout(self) -> bool:
+        """Match the column count to the window; returns whether that rebuilt the grid."""
         container_width = self.grid_container.width()
 
         card_width = 320
@@ -182,24 +358,47 @@ class HomeScreen(QWidget):
         if max_columns != getattr(self, '_current_columns', 0):
             self._current_columns = max_columns
             self.display_books(self.current_items)
+            return True
+        return False
 
     def _logout(self):
+        self.loader.shutdown()
         self.parent_widget.logout()
+
+    def _show_status(self, text: str):
+        """Replace the grid contents with a single status label."""
+        for i in reversed(range(self.grid_layout.count())):
+            widget = self.grid_layout.itemAt(i).widget()
+            if widget:
+                widget.deleteLater()
+
+        self._cover_labels = {}
+        self.loading_label = QLabel(text)
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.grid_layout.addWidget(self.loading_label, 0, 0, 1, 2)
     
     def _fetch_libraries(self):
-        """Fetch available libraries from the API and populate the dropdown."""
-        self.libraries = self.api.libraries()
-        
-        # Clear and populate library dropdown
+        """Fetch available libraries in the background."""
+        self._show_status("Loading Libraries...")
+        self.loader.load_libraries()
+
+    def _on_libraries_loaded(self, libraries):
+        """Populate the dropdown once the library list arrives."""
+        self.libraries = libraries
+
+        # Populate silently, then load the selected library once.
+        self.library_select.blockSignals(True)
         self.library_select.clear()
-        
         for lib_name in self.libraries:
             self.library_select.addItem(lib_name)
-            
+
         # Select the first library if available
+        if self.libraries:
+            self.current_library = list(self.libraries.values())[0]
+            self.library_select.setCurrentText(self.current_library.name)
+        self.library_select.blockSignals(False)
 
-        self.current_library = list(self.libraries.values())[0]
-        self.library_select.setCurrentText(self.current_library.name)
+        self._update_current_library()
     
     def _update_current_library(self):
         """Update the current library based on user selection."""
@@ -209,45 +408,49 @@ class HomeScreen(QWidget):
             self._fetch_books()
                     
     def _fetch_books(self):
-        """Load books for the currently selected library."""
+        """Load books for the currently selected library in the background."""
         if not self.current_library:
             return
 
-        # Clear existing widgets from grid.
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget and widget is not self.loading_label:
-                widget.deleteLater()
-
-        self.loading_label = QLabel("Loading Books...")
-        self.grid_layout.addWidget(self.loading_label, 0, 0, 1, 2)
+        self.current_items = []
+        self._show_status("Loading Books...")
+        self.loader.load_books(self.current_library.id)
 
-        try:
-            books = self.api.library_items(self.current_library.id)
-            self.current_items = books
-            self._adjust_grid_layout()
+    def _on_books_loaded(self, generation: int, books):
+        if generation != self.loader.generation:
+            return
+        self.current_items = books
+        if not self._adjust_grid_layout():
             self.display_books(books)
-        except ValueError as e:
-            print("Error loading books: ", e)
 
-    def _fetch_in_progress_books(self):
-
-        in_progress_ids = self.api.in_progress()
-
-        if not in_progress_ids:
-            self.in_progress_items = []
+    def _on_cover_loaded(self, generation: int, book_id: str, cover_path: str):
+        if generation != self.loader.generation:
             return
+        for book in self.current_items:
+            if book.id == book_id:
+                book.cover_path = cover_path
+                break
 
-        in_progress_books = []
-        for book_id in in_progress_ids:
+        cover_label = self._cover_labels.get(book_id)
+        if cover_label:
             try:
-                book = self.api.book_details(book_id)
-                if book:
-                    in_progress_books.append(book)
-            except Exception as e:
-                print(f"Error fetching in-progress book {book_id}: {e}")
+                cover_label.setPixmap(self._cover_pixmap(cover_path))
+            except RuntimeError:
+                # Card was rebuilt while the cover was downloading.
+                pass
+
+    def _on_loading_failed(self, stage: str, message: str):
+        if stage == "libraries":
+            self._show_status("Could not load libraries.")
+        elif stage == "books":
+            self._show_status("No results found.")
 
-        self.in_progress_items = in_progress_books
+    def _fetch_in_progress_books(self):
+        """Fetch in-progress books in the background."""
+        self.loader.load_in_progress()
+
+    def _on_in_progress_loaded(self, books):
+        self.in_progress_items = books
 
     def display_books(self, books):
         # Clear loading message
@@ -255,6 +458,7 @@ class HomeScreen(QWidget):
             widget = self.grid_layout.itemAt(i).widget()
             if widget:
                 widget.deleteLater()
+        self._cover_labels = {}
 
         if not books:
             self.grid_layout.addWidget(QLabel("No results found."), 0,0)
@@ -263,10 +467,8 @@ class HomeScreen(QWidget):
         rows, cols = 0,0
         max_columns = getattr(self, '_current_columns', 3)
 
+        # Covers that aren't cached yet arrive through the loader.
         for book in books:
-            if not hasattr(book, 'cover_path') or not book.cover_path:
-                book.cover_path = self.api.download_cover(book.id)
-
             book_card = self._create_book_card(book)
             book_card.setFixedSize(300,350)
             self.grid_layout.addWidget(book_card, rows, cols, 1, 1, Qt.AlignmentFlag.AlignCenter)
@@ -276,6 +478,13 @@ class HomeScreen(QWidget):
                 cols = 0
                 rows += 1
 
+    def _cover_pixmap(self, cover_path) -> QPixmap:
+        pixmap = QPixmap(cover_path) if cover_path and os.path.exists(cover_path) else None
+        if not pixmap or pixmap.isNull():
+            placeholder_path = "resources/PlaceholderCover.jpg"
+            pixmap = QPixmap(placeholder_path)
+        return pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+
     def _create_book_card(self, book, is_in_progress=False):
         """Creates a QWidget that represents a book."""
         frame = QFrame()
@@ -283,12 +492,9 @@ class HomeScreen(QWidget):
 
         cover_label = QLabel()
         cover_label.setFixedSize(220, 250)
-        pixmap = QPixmap(book.cover_path) if book.cover_path and os.path.exists(book.cover_path) else None
-        if not pixmap or pixmap.isNull():
-            placeholder_path = "resources/PlaceholderCover.jpg"
-            pixmap = QPixmap(placeholder_path)
-        cover_label.setPixmap(pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio))
+        cover_label.setPixmap(self._cover_pixmap(book.cover_path))
         cover_label.setProperty("class", "card_cover")
+        self._cover_labels[book.id] = cover_label
 
         title_label = QLabel(book.title)
         title_label.setWordWrap(False)
@@ -1,9 +1,10 @@
-from PyQt6.QtCore import Qt
+import threading
+from typing import Callable, Optional
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWidgets import (
     QCheckBox, QFrame, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox,
     QHBoxLayout, QSpacerItem, QSizePolicy
 )
-import importlib.resources
 
 from api.api import API
 from api.credentials import CredentialManager
@@ -12,21 +13,24 @@ import time
 class LoginScreen(QWidget):
     """Login screen"""
 
-    def __init__(self, on_login_success, api: API, credential_manager: CredentialManager):
+    login_finished = pyqtSignal(bool)
+    # Emitted on the UI thread once the saved token/password lookup finishes.
+    saved_login_loaded = pyqtSignal(dict)
+    _saved_login_fetched = pyqtSignal(dict)
+
+    def __init__(self, on_login_success, api: API, credential_manager: CredentialManager,
+                 on_token: Optional[Callable[[str], None]] = None):
         super().__init__()
         self.api = api
         self.creds = credential_manager
         self.on_login_success = on_login_success
+        # Called from the login thread as soon as the token arrives.
+        self.on_token = on_token
+        self.login_finished.connect(self._on_login_finished)
+        self._saved_login_fetched.connect(self._on_saved_login_fetched)
 
-        ## with open('styles/login.qss', 'r') as f:
-        ##     style = f.read()
-        ##     self.setStyleSheet(style)
-
-        with importlib.resources.path('styles', 'login.qss') as style_path:
-            f = open(style_path, 'r')
-            style = f.read()
-            self.setStyleSheet(style)
-            f.close()
+        # Styled by the application theme, see app/Theme.py
+        self.setObjectName("loginScreen")
 
         self.init_ui()
         self.load_saved_credentials()
@@ -86,15 +90,21 @@ class LoginScreen(QWidget):
 
     def load_saved_credentials(self):
         """Load saved credentials if available"""
-        creds = self.creds.get_credentials()
-        if creds["server_url"]:
-            self.server_input.setText(creds["server_url"])
-        if creds["username"]:
-            self.username_input.setText(creds["username"])
-        if creds["password"]:
-            self.password_input.setText(creds["password"])
-
-        self.remember_me.setChecked(creds["remember_me"])
+        # Plain settings come straight from the config; secrets arrive later
+        # from the keyring thread so the screen can paint right away.
+        config = self.creds.config
+        if config.get("last_server"):
+            self.server_input.setText(config["last_server"])
+        if config.get("username"):
+            self.username_input.setText(config["username"])
+        self.remember_me.setChecked(config.get("remember_me", False))
+
+        self.creds.get_saved_login_async(self._saved_login_fetched.emit)
+
+    def _on_saved_login_fetched(self, saved):
+        if saved["password"] and not self.password_input.text():
+            self.password_input.setText(saved["password"])
+        self.saved_login_loaded.emit(saved)
 
     def attempt_login(self):
         self.login_button.setEnabled(False)
@@ -111,24 +121,36 @@ class LoginScreen(QWidget):
             return
 
         self.api.set_base_url(server_url)
-        success = self.api.login(username, password)
+        self._pending_login = (server_url, username, password)
+
+        # Authenticate off the UI thread; on_token lets the caller start
+        # loading home data before this screen has even been torn down.
+        def login_task():
+            success = False
+            try:
+                success = self.api.login(username, password)
+                if success and self.on_token:
+                    self.on_token(self.api.token)
+            except Exception as e:
+                print(f"Error logging in: {e}")
+            self.login_finished.emit(success)
+
+        threading.Thread(target=login_task, daemon=True).start()
+
+    def _on_login_finished(self, success: bool):
+        server_url, username, password = self._pending_login
 
         if success:
-            if self.remember_me.isChecked():
-                self.creds.save_credentials(
-                    server_url,
-                    username,
-                    password,
-                    remember=True
-                    )
-            else:
-                self.creds.save_credentials(
-                    server_url,
-                    "",
-                    "",
-                    remember=False
-                    )
+            # Show the home screen first; saving credentials can wait on the keyring.
             self.on_login_success(self.api.token)
+            self.creds.submit(
+                self.creds.save_login,
+                server_url,
+                username,
+                password,
+                self.api.token,
+                remember=self.remember_me.isChecked()
+                )
         else:
             QMessageBox.critical(self, "Login Failed", "Invalid Credentials.")
 
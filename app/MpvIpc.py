@@ -0,0 +1,302 @@
+import itertools
+import json
+import os
+import secrets
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+# How long a request may wait for mpv's reply
+IPC_REQUEST_TIMEOUT = 5.0
+# How long a fresh mpv process gets to create its socket
+IPC_STARTUP_TIMEOUT = 10.0
+# More restarts than this within RESTART_WINDOW seconds and we give up
+MAX_RESTARTS = 5
+RESTART_WINDOW = 60.0
+# This many requests in a row without a reply and mpv counts as hung
+MAX_CONSECUTIVE_TIMEOUTS = 3
+
+
+class MpvIpc:
+    """
+    mpv in a subprocess, driven over its JSON IPC socket.
+
+    Offers the part of python-mpv's MPV that Player uses (property_observer,
+    event_callback, loadfile, playlist_append, seek, stop, terminate, and
+    properties as attributes), so it can stand in for the embedded player.
+    A decoder stall or crash then stays in the mpv process: requests are
+    matched to replies by request_id and time out instead of blocking,
+    and a dead process is restarted, with its observers and properties
+    restored and the restart callback told so playback can be reloaded.
+    A process that stays connected but stops answering is killed after
+    MAX_CONSECUTIVE_TIMEOUTS timeouts in a row, and restarted the same way.
+
+    Observer and event callbacks run on the socket reader thread, like
+    python-mpv's event thread. Unix sockets only; there is no
+    register_stream_protocol, since custom protocols live in-process.
+    """
+
+    def __init__(self, executable: str = "mpv", request_timeout: float = IPC_REQUEST_TIMEOUT,
+                 max_timeouts: int = MAX_CONSECUTIVE_TIMEOUTS, **options):
+        self._executable = executable
+        self._timeout = request_timeout
+        self._max_timeouts = max_timeouts
+        self._timeouts = 0
+        self._timeouts_lock = threading.Lock()
+        self._arguments = [self._option_argument(name, value) for name, value in options.items()]
+        self._process: Optional[subprocess.Popen] = None
+        self._socket: Optional[socket.socket] = None
+        self._socket_path: Optional[str] = None
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        # observe_property id -> (property name, callback)
+        self._observers: Dict[int, Tuple[str, Callable]] = {}
+        self._observer_ids = itertools.count(1)
+        self._event_callbacks: Dict[str, List[Callable]] = {}
+        # Properties set through this object, re-applied after a restart
+        self._properties: Dict[str, object] = {}
+        self._restart_callback: Optional[Callable[[], None]] = None
+        self._restarts: List[float] = []
+        self._closing = False
+        self._start()
+
+    @staticmethod
+    def _option_argument(name: str, value) -> str:
+        name = name.replace("_", "-")
+        if value is True:
+            return f"--{name}"
+        if value is False:
+            return f"--no-{name}"
+        return f"--{name}={value}"
+
+    # Process and socket
+
+    def _start(self) -> None:
+        self._socket_path = os.path.join(tempfile.gettempdir(), f"abs-mpv-{os.getpid()}-{secrets.token_hex(4)}.sock")
+        self._process = subprocess.Popen(
+            [self._executable, "--idle=yes", f"--input-ipc-server={self._socket_path}", *self._arguments],
+            stdin=subprocess.DEVNULL,
+        )
+        self._socket = self._connect()
+
+        reader = threading.Thread(target=self._read_loop, args=(self._socket,), name="mpv-ipc-reader", daemon=True)
+        reader.start()
+
+        for observer_id, (name, _callback) in self._observers.items():
+            self._send(["observe_property", observer_id, name])
+        for name, value in self._properties.items():
+            self._send(["set_property", name, value])
+
+    def _connect(self) -> socket.socket:
+        deadline = time.monotonic() + IPC_STARTUP_TIMEOUT
+        while True:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"mpv exited with status {self._process.returncode} during startup")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self._socket_path)
+                return sock
+            except OSError:
+                sock.close()
+                if time.monotonic() > deadline:
+                    self._process.kill()
+                    raise RuntimeError("Timed out waiting for the mpv IPC socket")
+                # mpv creates the socket shortly after starting
+                time.sleep(0.05)
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        try:
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._dispatch(message)
+        except OSError:
+            pass
+
+        if sock is self._socket and not self._closing:
+            print("mpv IPC connection lost")
+            self._fail_pending(ConnectionError("mpv IPC connection lost"))
+            self._restart()
+
+    def _restart(self) -> None:
+        now = time.monotonic()
+        self._restarts = [t for t in self._restarts if now - t < RESTART_WINDOW] + [now]
+        if len(self._restarts) > MAX_RESTARTS:
+            print(f"mpv restarted {MAX_RESTARTS} times within {RESTART_WINDOW:.0f}s; giving up")
+            return
+
+        self._stop_process()
+        try:
+            print("Restarting mpv")
+            self._start()
+        except Exception as e:
+            print(f"Error restarting mpv: {e}")
+            return
+        if self._restart_callback:
+            try:
+                self._restart_callback()
+            except Exception as e:
+                print(f"Error in mpv restart callback: {e}")
+
+    def _stop_process(self) -> None:
+        if self._socket:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            try:
+                self._process.wait(timeout=self._timeout)
+            except subprocess.TimeoutExpired:
+                pass
+        if self._socket_path:
+            try:
+                os.unlink(self._socket_path)
+            except OSError:
+                pass
+
+    # Requests and events
+
+    def _send(self, command) -> Future:
+        request_id = next(self._request_ids)
+        future = Future()
+        with self._pending_lock:
+            self._pending[request_id] = future
+        data = (json.dumps({"command": command, "request_id": request_id}) + "\n").encode()
+        try:
+            with self._send_lock:
+                self._socket.sendall(data)
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(ConnectionError(f"mpv IPC send failed: {e}"))
+        return future
+
+    def _request(self, command):
+        """Send a command and wait for its reply; raises TimeoutError or RuntimeError."""
+        future = self._send(command)
+        try:
+            result = future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            self._request_timed_out()
+            raise TimeoutError(f"mpv did not answer {command[0] if isinstance(command, list) else command['name']}")
+        with self._timeouts_lock:
+            self._timeouts = 0
+        return result
+
+    def _request_timed_out(self) -> None:
+        with self._timeouts_lock:
+            self._timeouts += 1
+            hung = self._timeouts >= self._max_timeouts
+            if hung:
+                self._timeouts = 0
+        if hung and not self._closing:
+            # Killing it drops the socket; the reader thread then restarts
+            # mpv through _restart, under the same restart limit as a crash.
+            print(f"mpv did not answer {self._max_timeouts} requests in a row; restarting it")
+            process = self._process
+            if process and process.poll() is None:
+                process.kill()
+
+    def _dispatch(self, message: Dict) -> None:
+        event = message.get("event")
+        if event is None:
+            with self._pending_lock:
+                future = self._pending.pop(message.get("request_id"), None)
+            if future and not future.done():
+                if message.get("error") == "success":
+                    future.set_result(message.get("data"))
+                else:
+                    future.set_exception(RuntimeError(f"mpv: {message.get('error')}"))
+            return
+
+        if event == "property-change":
+            observer = self._observers.get(message.get("id"))
+            callbacks = [observer[1]] if observer else []
+            args = (message.get("name"), message.get("data"))
+        else:
+            callbacks = self._event_callbacks.get(event, [])
+            args = (message,)
+
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in mpv {event} callback: {e}")
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    # python-mpv compatible interface
+
+    def set_restart_callback(self, callback: Optional[Callable[[], None]]) -> None:
+        """Called on the reader thread after mpv has been restarted."""
+        self._restart_callback = callback
+
+    def property_observer(self, name: str):
+        def register(callback):
+            observer_id = next(self._observer_ids)
+            self._observers[observer_id] = (name, callback)
+            self._send(["observe_property", observer_id, name])
+            return callback
+        return register
+
+    def event_callback(self, *event_types: str):
+        def register(callback):
+            for event_type in event_types:
+                self._event_callbacks.setdefault(event_type, []).append(callback)
+            return callback
+        return register
+
+    def loadfile(self, filename: str, mode: str = "replace", **options) -> None:
+        command = {"name": "loadfile", "url": filename, "flags": mode}
+        if options:
+            command["options"] = {name.replace("_", "-"): str(value) for name, value in options.items()}
+        self._request(command)
+
+    def playlist_append(self, filename: str, **options) -> None:
+        self.loadfile(filename, mode="append", **options)
+
+    def seek(self, amount: float, reference: str = "relative", precision: str = "default-precise") -> None:
+        self._request(["seek", amount, f"{reference}+{precision}"])
+
+    def stop(self) -> None:
+        self._request(["stop"])
+
+    def terminate(self) -> None:
+        self._closing = True
+        try:
+            self._request(["quit"])
+        except Exception:
+            pass
+        self._stop_process()
+        self._fail_pending(ConnectionError("mpv terminated"))
+
+    def __getattr__(self, name: str):
+        # Only reached for names that aren't real attributes: mpv properties.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._request(["get_property", name.replace("_", "-")])
+
+    def __setattr__(self, name: str, value) -> None:
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+            return
+        name = name.replace("_", "-")
+        self._request(["set_property", name, value])
+        self._properties[name] = value
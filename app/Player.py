@@ -1,51 +1,481 @@
 
 import queue
 from api.api import API
-import mpv
 import time
 import threading
+import itertools
 import os
-from typing import Optional, Callable, Dict, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from bisect import bisect_right
+from typing import Optional, Callable, Dict, List, Tuple
 
 from api.play_book import PlayBook
 from api.play_book import BookChapter
 from api.play_book import AudioFile
 
+# Download priorities; lower numbers are served first.
+PRIORITY_PLAYBACK = 0   # playback is blocked on this file
+PRIORITY_SEEK = 1       # the user seeked into this file
+PRIORITY_PREFETCH = 2   # speculative read-ahead
+
+DOWNLOAD_WORKERS = 2
+
+# Default skip distances, in seconds; also where predictive prefetch looks.
+SKIP_FORWARD_SECONDS = 30.0
+SKIP_BACKWARD_SECONDS = 10.0
+
+# mpv protocol for files that are still downloading: absgrowing://<library item id>/<file index>
+GROWING_PROTOCOL = "absgrowing"
+# MPV_ERROR_GENERIC, returned from a stream's seek to refuse it
+MPV_ERROR_GENERIC = -20
+
+# Watchdog for a single mpv command, including the event that confirms it
+MPV_COMMAND_TIMEOUT = 10.0
+
+# Where mpv runs: libmpv inside this process, or an mpv subprocess driven
+# over JSON IPC (see MpvIpc). ABS_CLIENT_MPV_BACKEND overrides the default.
+BACKEND_EMBEDDED = "embedded"
+BACKEND_IPC = "ipc"
+
+
+class GrowingFile:
+    """
+    Download progress of one cache file, shared between the download task
+    and any readers. Readers block until the bytes they want have landed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.available: int = 0
+        self.total: Optional[int] = None
+        self.complete: bool = False
+        self.failed: bool = False
+        self.condition = threading.Condition()
+
+    def update(self, available: int, total: int) -> None:
+        with self.condition:
+            self.available = available
+            self.total = total or None
+            self.condition.notify_all()
+
+    def reset(self) -> None:
+        """The transfer was abandoned and will start over."""
+        with self.condition:
+            self.available = 0
+
+    def finish(self, success: bool, path: Optional[str] = None) -> None:
+        with self.condition:
+            self.complete = success
+            self.failed = not success
+            if success and path:
+                self.path = path
+                self.available = self.total = os.path.getsize(path)
+            self.condition.notify_all()
+
+    def ready(self, size: int) -> bool:
+        """Whether at least `size` bytes (or the whole file) can be read."""
+        return self.complete or (not self.failed and self.available >= size)
+
+    def wait_for(self, size: int, abandoned: Callable[[], bool] = lambda: False) -> int:
+        """Block until `size` bytes are available or the download ends; returns the bytes available."""
+        with self.condition:
+            while not (self.ready(size) or self.failed or abandoned()):
+                self.condition.wait(timeout=0.5)
+            return self.available
+
+
+class GrowingFileReader:
+    """
+    An mpv stream (see MPV.register_stream_protocol) over a GrowingFile.
+
+    Reads past the download head wait for the data; seeks past it are refused,
+    so probing the end of the file doesn't stall startup.
+    """
+
+    def __init__(self, growing: GrowingFile):
+        self.growing = growing
+        # Opened now: on rename the handle follows the file to its final path.
+        self.file = open(growing.path, 'rb')
+        self.position = 0
+        self.cancelled = False
+
+    @property
+    def size(self) -> Optional[int]:
+        return self.growing.total
+
+    def read(self, size: int) -> bytes:
+        available = self.growing.wait_for(self.position + 1, lambda: self.cancelled)
+        if available <= self.position or self.cancelled:
+            return b""
+        self.file.seek(self.position)
+        data = self.file.read(min(size, available - self.position))
+        self.position += len(data)
+        return data
+
+    def seek(self, offset: int) -> int:
+        if offset > self.growing.available and not self.growing.complete:
+            return MPV_ERROR_GENERIC
+        self.position = offset
+        return offset
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class DownloadTask:
+    """
+    A queued or running download of one file.
+
+    Prefetches are paused (`resume` cleared) while more urgent downloads are
+    in flight, and aborted and requeued when they hold the only free worker.
+    Tasks keep the book they were queued for, and are cancelled outright when
+    another book is loaded.
+    """
+
+    def __init__(self, book: PlayBook, file_index: int, priority: int, generation: int):
+        self.book = book
+        # The library item, not the playback session: reopening a book starts
+        # a new session but must keep (and dedup against) its running downloads.
+        self.book_id = book.libraryItemId
+        self.file_index = file_index
+        self.priority = priority
+        self.generation = generation
+        self.callbacks: List[Callable[[bool], None]] = []
+        self.growing: Optional[GrowingFile] = None
+        self.started: bool = False
+        self.aborted: bool = False
+        self.cancelled: bool = False
+        self.resume = threading.Event()
+        self.resume.set()
+
+
+class MediaSource(ABC):
+    """
+    Decides what mpv opens for each file of the book. Before loading a file
+    the Player calls `prepare`, which may block; then `locate` gives the URI.
+    Both are only asked about files that aren't fully downloaded yet, or
+    that are, respectively.
+    """
+
+    @abstractmethod
+    def prepare(self, player: 'Player', file_index: int, priority: int) -> bool:
+        """Get a file ready to be opened; False if it can't be."""
+
+    @abstractmethod
+    def locate(self, player: 'Player', file_index: int) -> Optional[str]:
+        """The URI mpv should open for a file, or None if there's none yet."""
+
+
+class CachedSource(MediaSource):
+    """Download each file completely before playing it."""
+
+    def prepare(self, player: 'Player', file_index: int, priority: int) -> bool:
+        return player._download_file(file_index, wait=True, priority=priority)
+
+    def locate(self, player: 'Player', file_index: int) -> Optional[str]:
+        return player._downloaded_path(file_index)
+
+
+class ProgressiveSource(MediaSource):
+    """Play the cache file while it downloads, once min_start_bytes have landed."""
+
+    def prepare(self, player: 'Player', file_index: int, priority: int) -> bool:
+        return player._wait_for_download_start(file_index, priority)
+
+    def locate(self, player: 'Player', file_index: int) -> Optional[str]:
+        return player._downloaded_path(file_index) or player._growing_uri(file_index)
+
+
+class HybridSource(MediaSource):
+    """
+    Play from cache when the file is there; otherwise stream it through the
+    local media proxy right away while it downloads in the background. The
+    next load of the file (a file boundary, a seek) picks up the cached copy.
+    """
+
+    def prepare(self, player: 'Player', file_index: int, priority: int) -> bool:
+        player._download_file(file_index, priority=priority)
+        return True
+
+    def locate(self, player: 'Player', file_index: int) -> Optional[str]:
+        # Not the partial download: a stream can seek anywhere, the partial file can't.
+        return player._downloaded_path(file_index) or player._stream_url(file_index)
+
+
+class ReadAheadController:
+    """
+    Sizes read-ahead from playback speed and download throughput.
+
+    The next file's download is held back until the wall-clock time left in
+    the current file, at the current speed, gets close to how long the next
+    file is expected to take to download. Fast links at 1x fetch late (and
+    so fetch less for books that are abandoned); slow links at 3x start
+    early enough that the file boundary doesn't underrun. mpv's own cache
+    window is scaled by speed the same way, so it covers a fixed wall time.
+    """
+
+    def __init__(self, safety_factor: float = 1.5, margin_seconds: float = 30.0,
+                 cache_wall_seconds: float = 20.0, smoothing: float = 0.3):
+        self.safety_factor = safety_factor
+        self.margin_seconds = margin_seconds
+        self.cache_wall_seconds = cache_wall_seconds
+        self.smoothing = smoothing
+        # Smoothed download throughput in bytes/s; None until measured.
+        self.throughput: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        """Feed one throughput sample."""
+        if nbytes <= 0 or seconds <= 0:
+            return
+        sample = nbytes / seconds
+        with self.lock:
+            if self.throughput is None:
+                self.throughput = sample
+            else:
+                self.throughput += self.smoothing * (sample - self.throughput)
+
+    def download_seconds(self, nbytes: int) -> Optional[float]:
+        with self.lock:
+            if not self.throughput or nbytes <= 0:
+                return None
+            return nbytes / self.throughput
+
+    def should_start_next(self, remaining_media_seconds: float, speed: float, next_file_bytes: int) -> bool:
+        """Whether the next file's download has to start now to be ready in time."""
+        download_time = self.download_seconds(next_file_bytes)
+        if download_time is None:
+            # Nothing to go on yet; fetch eagerly as before.
+            return True
+        wall_left = remaining_media_seconds / max(speed, 0.1)
+        return wall_left <= download_time * self.safety_factor + self.margin_seconds
+
+    def cache_seconds(self, speed: float, remaining_media_seconds: Optional[float] = None) -> float:
+        """Media seconds mpv should buffer ahead to cover cache_wall_seconds at this speed."""
+        seconds = self.cache_wall_seconds * max(speed, 1.0)
+        if remaining_media_seconds is not None:
+            # Past the end of the file the next playlist entry takes over.
+            seconds = min(seconds, max(remaining_media_seconds, self.cache_wall_seconds))
+        return seconds
+
+
+class CommandExecutor:
+    """
+    A long-lived worker that runs queued calls one at a time, in order.
+
+    The Player keeps one for every call into mpv, so the UI, download and
+    mpv event threads never race each other inside libmpv, one for
+    track-end handling, which may block on a download, and one for
+    prefetching, which waits on the network. `submit` queues a
+    call and returns its Future; `call` also waits for it and, with
+    `until`, for an mpv event that confirms it took effect (observers
+    call `notify` after recording one). Both waits share the watchdog
+    timeout. Code on mpv's event thread must only `submit`, or `call`
+    without `until`: the confirming event can't arrive while it waits.
+    """
+
+    def __init__(self, name: str, timeout: float = MPV_COMMAND_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self.queue: queue.Queue = queue.Queue()
+        self.events = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if future.set_running_or_notify_cancel():
+                self._execute(future, fn, args, kwargs)
+
+    @staticmethod
+    def _execute(future: Future, fn: Callable, args, kwargs) -> None:
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a call; a call made from the worker itself runs inline."""
+        future = Future()
+        if threading.current_thread() is self.thread:
+            future.set_running_or_notify_cancel()
+            self._execute(future, fn, args, kwargs)
+        else:
+            self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn: Callable, *args, until: Optional[Callable[[], bool]] = None,
+             timeout: Optional[float] = None, **kwargs):
+        """Run a call and wait for its result (and `until`); raises TimeoutError past the watchdog."""
+        future = self.submit(fn, *args, **kwargs)
+        return self.wait(future, getattr(fn, "__name__", repr(fn)), until=until, timeout=timeout)
+
+    def wait(self, future: Future, name: str, until: Optional[Callable[[], bool]] = None,
+             timeout: Optional[float] = None):
+        """`call`'s second half, for a Future from `submit`: its result, then `until`."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drop it if it hasn't started; a stuck call can't be interrupted.
+            future.cancel()
+            raise TimeoutError(f"{self.name}: {name} timed out after {timeout:.0f}s")
+
+        if until is not None:
+            with self.events:
+                if not self.events.wait_for(until, timeout=max(deadline - time.monotonic(), 0.0)):
+                    raise TimeoutError(f"{self.name}: {name} not confirmed after {timeout:.0f}s")
+        return result
+
+    def notify(self) -> None:
+        """Wake `call`s waiting on an event."""
+        with self.events:
+            self.events.notify_all()
+
+    def shutdown(self) -> None:
+        self.queue.put(None)
+
+
+class PlaybackState:
+    """
+    Aggregates mpv's property notifications into one snapshot.
+
+    mpv calls the observers on its own event thread; `update` records the new
+    value under a lock and reports whether anything actually changed, so the
+    player only reacts to real transitions.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.time_pos: Optional[float] = None
+        self.paused: bool = False
+        self.eof: bool = False
+        self.idle: bool = True
+        # Bumped on every mpv file-loaded event
+        self.file_loads: int = 0
+
+    def update(self, field: str, value) -> bool:
+        with self.lock:
+            if getattr(self, field) == value:
+                return False
+            setattr(self, field, value)
+            return True
+
+
 class Player:
     _instance = None
-    def __new__(cls, api:Optional[API] = None):
+    def __new__(cls, api:Optional[API] = None, *args, **kwargs):
         if cls._instance is None:
             cls._instance=super(Player,cls).__new__(cls)
             cls._instance._initialized = False
         return cls._instance
-    def __init__(self, api:API):
+    def __init__(self, api:API, download_workers: int = DOWNLOAD_WORKERS, source: Optional[MediaSource] = None,
+                 backend: Optional[str] = None):
         # Singleton
         if self._initialized:
             return
         self._initialized = True
 
-        self.player = mpv.MPV(video=False, terminal=False, quiet=False)
+        self.backend: str = backend or os.environ.get("ABS_CLIENT_MPV_BACKEND") or BACKEND_EMBEDDED
+        self.player = self._create_mpv(self.backend)
         self.api: API = api
         self.book: Optional['PlayBook'] = None
         self.temp_dir: Optional[str] = None
+        # Library item id of the loaded book; keys downloads across sessions
         self.current_book_id: Optional[str] = None
 
         # State
         self.playing: bool = None
         self.paused: bool = None
         self.stop_requested: bool = False
+        self._stop_requested: bool = False
+        self.state = PlaybackState()
 
         # Time tracking
         self.global_position: float = 0.0
         self.track_position: float = 0.0
         self.current_file_index: int = 0
         self.current_chapter_index: int = 1
-
-        # Temp file tracking
-        self.downloaded_files: Dict[str, Dict[int,str]] = {}
-        self.download_queue = queue.Queue()
+        # Smallest position change (seconds) worth reporting to on_position_change
+        self.position_resolution: float = 0.2
+        self._last_reported_position: Optional[float] = None
+
+        # Position lookup tables, rebuilt for each book by _build_position_index
+        self._indexed_book: Optional[PlayBook] = None
+        self._file_offsets: List[float] = [0.0]
+        self._chapter_starts: List[float] = []
+
+        # Gapless playback. With every file cached the book is loaded as one
+        # EDL timeline (mpv's time-pos is then the global position); otherwise
+        # files [_playlist_start, _playlist_end) are queued in mpv's playlist,
+        # which is extended as downloads finish.
+        self.use_timeline: bool = True
+        self.timeline_active: bool = False
+        self._loaded_source: Optional[str] = None
+        self._playlist_start: int = 0
+        self._playlist_end: int = 0
+        # What mpv was given for each file in the current playlist
+        self._playlist_sources: Dict[int, str] = {}
+        self._playlist_lock = threading.Lock()
+
+        # Where each file is played from; see MediaSource.
+        self.source: MediaSource = source or HybridSource()
+        # A file that is still downloading becomes playable from the cache
+        # once min_start_bytes of it are on disk.
+        self.min_start_bytes: int = 256 * 1024
+        self._growing_files: Dict[Tuple[str, int], GrowingFile] = {}
+        if self.backend == BACKEND_IPC:
+            # Stream protocols are in-process only; stream through the proxy instead.
+            if isinstance(self.source, ProgressiveSource):
+                print("Progressive playback needs the embedded mpv backend; streaming instead")
+                self.source = HybridSource()
+            self.player.set_restart_callback(self._on_backend_restart)
+        else:
+            self.player.register_stream_protocol(GROWING_PROTOCOL, self._open_growing_stream)
+        # Bytes fetched at a streamed seek target (located via the file's seek
+        # index) before mpv is pointed at it.
+        self.seek_warm_bytes: int = 256 * 1024
+        # Predictive prefetch: after a load, seek or chapter change, warm the
+        # likely next seek targets (adjacent chapter starts, skip distances)
+        # the same way, up to prefetch_budget_bytes per round.
+        self.prefetch_budget_bytes: int = 1024 * 1024
+        self._prefetch_round: int = 0
+        self._prefetch_anchor: Optional[float] = None
+        # When to start the next file, and how much mpv buffers; see ReadAheadController.
+        self.playback_speed: float = 1.0
+        self.read_ahead = ReadAheadController()
+        # (book id, file index) last started by _read_ahead, so a failed
+        # download isn't retried on every position update
+        self._read_ahead_started: Optional[Tuple[str, int]] = None
+
+        # Temp file tracking: library item id -> file index -> path, for the
+        # max_tracked_books most recently used books
+        self.downloaded_files: 'OrderedDict[str, Dict[int, str]]' = OrderedDict()
+        self.max_tracked_books: int = 8
+        self._downloaded_lock = threading.Lock()
+        # Entries are (priority, sequence, task); promoting a task queues a new
+        # entry and the stale one is skipped when it comes up.
+        self.download_queue = queue.PriorityQueue()
+        self.download_workers: int = max(1, download_workers)
         self.is_downloading = False
         self.download_lock = threading.Lock()
+        self._download_tasks: Dict[Tuple[str, int], DownloadTask] = {}
+        self._download_sequence = itertools.count()
+        self._active_downloads: int = 0
+        # Bumped by every load_book; work queued for an earlier load is stale.
+        self._load_generation: int = 0
+        self.download_threads: List[threading.Thread] = []
 
         # Start the download worker
         self._start_download_worker()
@@ -56,31 +486,82 @@ class Player:
         self.on_file_change: Optional[Callable[[int], None]] = None
         self.on_playback_end: Optional[Callable[[], None]] = None
         self.on_download_progress: Optional[Callable[[int, float], None]] = None
+        # (position, success) when a seek into another file has finished
+        self.on_seek_complete: Optional[Callable[[float, bool], None]] = None
+        # Bumped by every seek, so a seek still waiting for its file is dropped
+        # once a newer one comes in
+        self._seek_generation: int = 0
 
         # Background tasks
-        self.position_thread: Optional[threading.Thread] = None
         self.preload_thread: Optional[threading.Thread] = None
-        self.download_thread: Optional[threading.Thread] = None
+
+        # Every mpv call goes through `commands`; track ends and seeks into
+        # another file are handled on `control`, since they may wait for a
+        # download. See CommandExecutor.
+        self.commands = CommandExecutor("mpv-commands")
+        self.control = CommandExecutor("player-control")
 
         # Set default volume
-        self.player.volume = 100
+        self.commands.submit(setattr, self.player, "volume", 100)
+        # Seek warming, predictive prefetch and seek index builds: network
+        # work nothing on the UI thread should wait for.
+        self.prefetch = CommandExecutor("prefetch")
+        self._cache_seconds: Optional[float] = None
 
         self._handling_track_end = threading.Event()
         
-        # Register event handlers
+        # Register event handlers; these replace polling mpv for position.
+        @self.player.property_observer("time-pos")
+        def handle_time_pos(_name, value):
+            if self.state.update("time_pos", value) and value is not None:
+                self._on_time_pos(value)
+
+        @self.player.property_observer("pause")
+        def handle_pause(_name, value):
+            if self.state.update("paused", bool(value)):
+                self.commands.notify()
+
+        @self.player.event_callback("file-loaded")
+        def handle_file_loaded(_event):
+            with self.state.lock:
+                self.state.file_loads += 1
+            self.commands.notify()
+
         @self.player.property_observer("eof-reached")
         def handle_end(_name, value):
-            if value and self.playing:
-                print("EOF detected by MPV (backup method)")
-                threading.Thread(target=self._handle_track_end, daemon=True).start()
+            if self.state.update("eof", bool(value)) and value and self.playing:
+                print("EOF detected by MPV")
+                self._queue_track_end()
 
         @self.player.property_observer("idle-active")
         def handle_idle_change(_name, value):
-            if value and self.playing and not self.paused:
+            if self.state.update("idle", bool(value)) and value and self.playing and not self.paused:
                 print("Player has become idle while playing - handling as track end")
-                threading.Thread(target=self._handle_track_end, daemon=True).start()
-
-
+                self._queue_track_end()
+
+        @self.player.property_observer("playlist-pos")
+        def handle_playlist_pos(_name, value):
+            if value is not None and value >= 0:
+                self._on_playlist_pos(value)
+
+
+    @staticmethod
+    def _create_mpv(backend: str):
+        # keep_open makes mpv hold the last frame and raise eof-reached at the end
+        # of the playlist instead of unloading it, which gives us a reliable EOF.
+        # gapless_audio/prefetch_playlist let mpv open the next playlist entry
+        # before the current one ends, so file boundaries don't leave a gap.
+        options = dict(video=False, terminal=False, quiet=False, keep_open="yes",
+                       gapless_audio="yes", prefetch_playlist="yes")
+        if backend == BACKEND_IPC:
+            from .MpvIpc import MpvIpc
+            return MpvIpc(**options)
+        if backend != BACKEND_EMBEDDED:
+            print(f"Unknown mpv backend {backend!r}; using {BACKEND_EMBEDDED}")
+
+        # Imported here so libmpv is only loaded once something needs playback.
+        import mpv
+        return mpv.MPV(**options)
 
     def set_player_bar(self, player_bar):
         """Set reference to PlayerBar for UI updates."""
@@ -95,26 +576,34 @@ class Player:
             if self.playing:
                 self.stop()
 
+            self._load_generation += 1
+            self._cancel_downloads(keep_book_id=book.libraryItemId)
+
             self.book = book
-            self.current_book_id = book.id
+            self.current_book_id = book.libraryItemId
+            self._loaded_source = None
+            self.timeline_active = False
             self.global_position = book.currentTime
+            self._build_position_index()
 
             # Find current file and chapter based on position
             self.current_file_index, self.track_position = self._get_file_from_position(self.global_position)
             self.current_chapter_index = self._get_chapter_from_position(self.global_position)
 
-            if self.current_book_id not in self.downloaded_files:
-                self.downloaded_files[self.current_book_id] = {}
+            self._book_downloads(self.current_book_id)
+            self._register_cached_files()
+            self._index_in_background(self.current_file_index)
 
-            # MUST set wait to true here.
-            success = self._download_file(self.current_file_index, wait=True)
+            # MUST wait here (for the whole file, or its start in progressive mode).
+            success = self._prepare_file(self.current_file_index, PRIORITY_PLAYBACK)
             if not success:
                 print("Failed to download initial audio file.")
                 return False
 
-            # Preload the next file in the background
+            # Preload the next file in the background, once it's due
             #self._start_preload(self.current_file_index + 1)
-            self._download_file(self.current_file_index + 1, wait=False)
+            self._read_ahead()
+            self._schedule_prefetch()
 
             return True
 
@@ -132,72 +621,38 @@ class Player:
 
             if hasattr(self, 'player_bar') and self.player_bar:
                 self.player_bar.on_book_loaded(self.book)
-                self.player_bar.update_play_button_state()
-            
+
             if self.paused:
-                self.player.pause = False
+                self._set_property("pause", False)
                 self.paused = False
                 self.playing = True
 
             # DONT PUT ANYTHING BETWEEN THESE TWO. YOU'LL BREAK PLAYBACK
             else:
                 # Ensure current file is loaded
-                file_path = None
-                if self.current_book_id in self.downloaded_files:
-                    file_path = self.downloaded_files[self.current_book_id].get(self.current_file_index)
-                if not file_path:
+                if not self._playable_source(self.current_file_index):
                     print("Current file is not downloaded.")
                     return False
 
-                play_event = threading.Event()
-                play_success = [False]
-
-                def play_thread_func():
-                    try:
-
-                        # Load file if not loaded
-                        if not self.player.filename or self.player.filename != os.path.basename(file_path):
-                            self.player.play(file_path)
-
-                            load_start = time.time()
-                            while time.time() - load_start < 1.0: # 5 second timeout
-                                if self.player.idle is False:
-                                    break
-                                time.sleep(0.1)
-
-                            if self.track_position > 0:
-                                self.player.seek(self.track_position, reference="absolute")
-                        self.player.pause = False
-                        self._stop_requested = False
-                        play_success[0] = True
-                        play_event.set()
-                    except Exception as e:
-                        print(f"Error in play thread: {e}")
-                        play_success[0] = False
-                        play_event.set()
-
-                play_thread = threading.Thread(target=play_thread_func)
-                play_thread.daemon = True
-                play_thread.start()
-
-                if not play_event.wait(timeout=10.0):
-                    print("Playback start timed out.")
+                try:
+                    # Load the book if nothing is loaded yet
+                    if self._loaded_source is None:
+                        self._load_media(self.current_file_index, self.track_position)
+                    self._set_property("pause", False)
+                    self._stop_requested = False
+                except TimeoutError as e:
+                    print(f"Playback start timed out: {e}")
                     return False
-
-                if not play_success[0]:
-                    print("Playback failed to start")
+                except Exception as e:
+                    print(f"Playback failed to start: {e}")
                     return False
                 
                 self.playing = True
                 self.paused = False
 
-                if not self.position_thread or not self.position_thread.is_alive():
-                    self.position_thread = threading.Thread(target=self._track_position)
-                    self.position_thread.daemon = True
-                    self.position_thread.start()
-
                 # print(f"Started playback at position {self.global_position:.2f}s")
 
+            self._update_play_button()
             return True
         except Exception as e:
             print(f"Error playing: {e}")
@@ -208,8 +663,9 @@ class Player:
         try:
             # print(f"Playing: {self.playing} ; Paused: {self.paused}")
             if self.playing and not self.paused:
-                self.player.pause = True
+                self._set_property("pause", True)
                 self.paused = True
+                self._update_play_button()
                 return True
 
             print("Error pausing (not playing or already paused)")
@@ -218,11 +674,18 @@ class Player:
             print(f"Error pausing: {e}")
             return False
 
+    def _update_play_button(self) -> None:
+        """Show the play/pause state on the player bar; call after `playing`/`paused` change."""
+        if getattr(self, 'player_bar', None):
+            self.player_bar.update_play_button_state()
+
     def stop(self) -> bool:
         """Stop playback"""
         try:
             self._stop_requested = True
-            self.player.stop()
+            self.commands.call(self.player.stop)
+            self._loaded_source = None
+            self.timeline_active = False
             self.playing = False
             self.paused = False
             return True
@@ -231,7 +694,11 @@ class Player:
             return False
 
     def seek_to_position(self, position: float) -> bool:
-        """Seek to a specific position in the audiobook (global position in seconds)"""
+        """
+        Seek to a specific position in the audiobook (global position in seconds).
+        A seek into another file may have to wait for its download, so it
+        returns once queued on `control` and reports through on_seek_complete.
+        """
         try:
             if not self.book:
                 print("No book loaded")
@@ -243,101 +710,109 @@ class Player:
 
             file_index, local_position = self._get_file_from_position(position)
             chapter_index = self._get_chapter_from_position(position)
+            self._seek_generation += 1
 
             #print(f"Seeking to global position {position:.2f}s (File: {file_index}, Local: {local_position:.2f}s)")
 
+            if self.timeline_active:
+                # The whole book is one mpv timeline; no file switch needed.
+                self.commands.call(self.player.seek, position, reference="absolute")
+                if file_index != self.current_file_index:
+                    self.current_file_index = file_index
+                    if self.on_file_change:
+                        self.on_file_change(file_index)
+
             # Check if we need to switch to a different file 
-            if file_index != self.current_file_index:
+            elif file_index != self.current_file_index:
                 #print(f"Seeking across files: {self.current_file_index} -> {file_index}")
-                
-                file_path = None
-                if self.current_book_id in self.downloaded_files:
-                    file_path = self.downloaded_files[self.current_book_id].get(file_index)
-                    
-                if not file_path:
-                    print(f"Downloading file {file_index} for seek operation...")
-                    success = self._download_file(file_index)
-                    if not success:
-                        print(f"Failed to download file for seek operation.")
-                        return False
-                    
-                    file_path = self.downloaded_files[self.current_book_id].get(file_index)
-                    if not file_path:
-                        print(f"File downloaded, but path not available for file index {file_index}")
-                        return False
-
-                if not os.path.exists(file_path):
-                    print(f"File exists in cache, but file not found: {file_path}")
-                    success = self._download_file(file_index, wait=True)
-                    if not success:
-                        return False
-                    file_path = self.downloaded_files[self.current_book_id].get(file_index)
-                    if not file_path or not os.path.exists(file_path):
-                        return False
+                self.control.submit(self._seek_across_files, self.book, self._seek_generation,
+                                    position, file_index, local_position, chapter_index)
+                return True
 
-                file_loaded = threading.Event()
-                load_success = [False]
-                
-                def file_load_thread():
-                    try:
-                        print(f"Loading file: {file_path}")
-                        self.player.play(file_path)
-                        time.sleep(0.5)
-                        load_success[0] = True
-                        file_loaded.set()
-                    except Exception as e:
-                        print(f"Error loading file in seek operation: {e}")
-                        load_success[0] = False
-                        file_loaded.set()
-
-                load_thread = threading.Thread(target=file_load_thread)
-                load_thread.daemon = True
-                load_thread.start()
-
-                if not file_loaded.wait(timeout=10.0):
-                    print("Timed out waiting for file to load during seek")
+            elif (self._loaded_source is not None
+                  and self._playlist_sources.get(file_index) != self._playable_source(file_index)):
+                # A better source for this file has turned up since it was loaded
+                # (usually the finished download of a streamed file); switch to it.
+                self._warm_position(file_index, local_position)
+                try:
+                    self._load_media(file_index, local_position)
+                    self._set_property("pause", bool(self.paused))
+                except Exception as e:
+                    print(f"Error reloading file during seek: {e}")
                     return False
 
-                if not load_success[0]:
-                    print("Failed to load file during seek operation.")
+            else:
+                # Seek within the current file
+                # Make sure we have a valid position before seeking
+                try:
+                    if local_position >= 0:
+                        self._warm_position(file_index, local_position)
+                        # print(f"Seeking to local position: {local_position:.2f}s")
+                        self.commands.call(self.player.seek, local_position, reference="absolute")
+                    else:
+                        print(f"Invalid local position: {local_position}")
+                        return False
+                except Exception as e:
+                    print(f"Error during local seek: {e}")
                     return False
-                
+
+            self._finish_seek(position, local_position, chapter_index)
+            return True
+        except Exception as e:
+            print(f"Error seeking: {e}")
+            return False
+
+    def _seek_across_files(self, book: PlayBook, generation: int, position: float,
+                           file_index: int, local_position: float, chapter_index: int) -> None:
+        """Wait for the target file, load it and report back; runs on `control`."""
+        def current() -> bool:
+            return self.book is book and self._seek_generation == generation
+
+        success = False
+        try:
+            if not self._prepare_file(file_index, PRIORITY_SEEK):
+                print(f"Failed to download file for seek operation.")
+            elif not current():
+                # A newer seek or another book took over while we waited.
+                return
+            else:
+                self._warm_position(file_index, local_position)
+
+                # Set before loading so the playlist-pos observer sees no file change.
                 self.current_file_index = file_index
+                print(f"Loading file {file_index}")
+                self._load_media(file_index, local_position)
+                # keep_open leaves mpv paused after an EOF; follow our own state.
+                self._set_property("pause", bool(self.paused))
 
-                # Preload the next file, and the previous one
-                self._download_file(file_index + 1, wait=False)
+                # Preload the next file when it's due, and the previous one
+                self._read_ahead()
                 if file_index > 0:
                     self._download_file(file_index - 1, wait=False)
 
                 if self.on_file_change:
                     self.on_file_change(file_index)
+                self._finish_seek(position, local_position, chapter_index)
+                success = True
+        except Exception as e:
+            print(f"Error loading file in seek operation: {e}")
 
-            # Seek within the current file
-            # Make sure we have a valid position before seeking
-            try:
-                if local_position >= 0:
-                    # print(f"Seeking to local position: {local_position:.2f}s")
-                    self.player.seek(local_position, reference="absolute")
-                else:
-                    print(f"Invalid local position: {local_position}")
-                    return False
-            except Exception as e:
-                print(f"Error during local seek: {e}")
-                return False
+        if self.on_seek_complete and current():
+            self.on_seek_complete(position, success)
 
-            self.global_position = position
-            self.track_position = local_position
+    def _finish_seek(self, position: float, local_position: float, chapter_index: int) -> None:
+        """Record where a seek landed and tell the UI about a chapter change."""
+        self.global_position = position
+        self.track_position = local_position
+        self._last_reported_position = None
 
-            if chapter_index != self.current_chapter_index:
-                self.current_chapter_index = chapter_index
-                if self.on_chapter_change:
-                    self.on_chapter_change(chapter_index)
+        if chapter_index != self.current_chapter_index:
+            self.current_chapter_index = chapter_index
+            if self.on_chapter_change:
+                self.on_chapter_change(chapter_index)
 
-            # print(f"Seeked to position: {position:.2f}s (File: {file_index}, Chapter: {chapter_index}, Local: {local_position:.2f}s)")
-            return True
-        except Exception as e:
-            print(f"Error seeking: {e}")
-            return False
+        self._schedule_prefetch()
+        # print(f"Seeked to position: {position:.2f}s (Chapter: {chapter_index}, Local: {local_position:.2f}s)")
 
     def seek_to_chapter(self, chapter_index: int) -> bool:
         """Seek to the beginning of a specific chapter"""
@@ -389,7 +864,7 @@ class Player:
             
         return self.seek_to_chapter(prev_index)
 
-    def skip_forward(self, seconds: float = 30.0) -> bool:
+    def skip_forward(self, seconds: float = SKIP_FORWARD_SECONDS) -> bool:
         """Skip forward by the specified number of seconds"""
         if not self.book:
             return False
@@ -397,7 +872,7 @@ class Player:
         new_position = min(self.global_position + seconds, self.book.duration)
         return self.seek_to_position(new_position)
     
-    def skip_backward(self, seconds: float = 10.0) -> bool:
+    def skip_backward(self, seconds: float = SKIP_BACKWARD_SECONDS) -> bool:
         """Skip backward by the specified number of seconds"""
         if not self.book:
             return False
@@ -413,7 +888,9 @@ class Player:
             elif speed > 3.0:
                 speed = 3.0
                 
-            self.player.speed = speed
+            self._set_property("speed", speed, confirm=False)
+            self.playback_speed = speed
+            self._read_ahead()
             return True
         except Exception as e:
             print(f"Error setting playback speed: {e}")
@@ -427,7 +904,7 @@ class Player:
             elif volume > 100:
                 volume = 100
             
-            self.player.volume = volume
+            self._set_property("volume", volume, confirm=False)
             return True
         except Exception as e:
             print(f"Error setting volume: {e}")
@@ -483,6 +960,10 @@ class Player:
         """Set callback for end of playback"""
         self.on_playback_end = callback
     
+    def set_seek_callback(self, callback: Callable[[float, bool], None]) -> None:
+        """Set callback for when a seek into another file has finished (position, success)"""
+        self.on_seek_complete = callback
+
     def set_download_progress_callback(self, callback: Callable[[int, float], None]) -> None:
         """Set callback for download progress updates"""
         self.on_download_progress = callback
@@ -490,113 +971,447 @@ class Player:
 
     # Internal Methods
 
-    def _track_position(self) -> None:
-        """Thread to track playback position."""
-        last_chapter = self.current_chapter_index
-        last_check_time = time.time()
+    def _on_time_pos(self, local_pos: float) -> None:
+        """Update positions from an mpv time-pos notification."""
+        if not self.book or not self.playing or self._stop_requested:
+            return
 
-        while self.playing and not self._stop_requested:
-            if not self.paused and self.book:
-                try:
-                    local_pos = self.player.time_pos
-                    if local_pos is not None:
-                        self.track_position = local_pos
-
-                        file_offset = self._get_file_offset(self.current_file_index)
-                        self.global_position = file_offset + local_pos
-
-                        # Check for chapter change
-                        chapter_idx = self._get_chapter_from_position(self.global_position)
-                        if chapter_idx != last_chapter:
-                            self.current_chapter_index = chapter_idx
-                            last_chapter = chapter_idx
-                            if self.on_chapter_change:
-                                self.on_chapter_change(chapter_idx)
-
-                        if self.on_position_change:
-                            self.on_position_change(self.global_position, self.current_chapter_index)
-
-                        # Check if we're near the end of the current file
-                        current_file = self.book.media_files[self.current_file_index]
-                        if local_pos > current_file.duration - 0.5:
-                            # Check if the time has been stuck here for more than 2 seconds
-                            current_time = time.time()
-                            if current_time - last_check_time > 2.0:
-                                print("Detected playback stuck near file end - forcing transition")
-                                self._handle_track_end()
-                        last_check_time = time.time()
-                    else:
-                        # if time_pos is None, but we're supposed to be playing
-                        # Might have missed the EOF event
-                        if time.time() - last_check_time > 2.0:
-                            print("No position reported for 2 seconds - checking if we need to transition.")
-                            if self.current_file_index < len(self.book.media_files) - 1:
-                                self._handle_track_end()
-                        last_check_time = time.time()
+        try:
+            if self.timeline_active:
+                # time-pos runs over the whole EDL timeline
+                self.global_position = local_pos
+                file_index, self.track_position = self._get_file_from_position(local_pos)
+                if file_index != self.current_file_index:
+                    self.current_file_index = file_index
+                    if self.on_file_change:
+                        self.on_file_change(file_index)
+            else:
+                self.track_position = local_pos
+                self.global_position = self._get_file_offset(self.current_file_index) + local_pos
+
+            # Check for chapter change
+            chapter_idx = self._get_chapter_from_position(self.global_position)
+            chapter_changed = chapter_idx != self.current_chapter_index
+            if chapter_changed:
+                self.current_chapter_index = chapter_idx
+                if self.on_chapter_change:
+                    self.on_chapter_change(chapter_idx)
+
+            # Skip targets move with playback; refresh them once they've drifted.
+            if (chapter_changed or self._prefetch_anchor is None
+                    or abs(self.global_position - self._prefetch_anchor) >= SKIP_FORWARD_SECONDS):
+                self._schedule_prefetch()
+
+            last = self._last_reported_position
+            if (chapter_changed or last is None
+                    or abs(self.global_position - last) >= self.position_resolution):
+                self._last_reported_position = self.global_position
+                self._read_ahead()
+                if self.on_position_change:
+                    self.on_position_change(self.global_position, self.current_chapter_index)
+        except Exception as e:
+            print(f"Error tracking position: {e}")
 
-                except Exception as e:
-                    print(f"Error tracking position: {e}")
+    def _on_playlist_pos(self, pos: int) -> None:
+        """mpv moved to another playlist entry, usually a gapless file transition."""
+        if not self.book or self.timeline_active or self._loaded_source is None:
+            return
 
-            time.sleep(0.2)
+        file_index = self._playlist_start + pos
+        if file_index == self.current_file_index or file_index >= len(self.book.media_files):
+            return
 
-    def _handle_track_end(self) -> None:
-        """Handle end of current track"""
-        if not self.book or self._stop_requested:
+        self.current_file_index = file_index
+        self.track_position = 0.0
+        self._last_reported_position = None
+
+        # Keep the playlist one file ahead of playback
+        self._read_ahead()
+        self._extend_playlist()
+
+        if self.on_file_change:
+            self.on_file_change(file_index)
+
+    def _downloaded_path(self, file_index: int) -> Optional[str]:
+        """Local path of a downloaded file of the current book, if it's on disk."""
+        path = self.downloaded_files.get(self.current_book_id, {}).get(file_index)
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def _playable_source(self, file_index: int) -> Optional[str]:
+        """What mpv should open for a file, according to the media source."""
+        return self.source.locate(self, file_index)
+
+    def _prepare_file(self, file_index: int, priority: int) -> bool:
+        """Make a file playable, blocking for as long as the media source needs."""
+        if self._downloaded_path(file_index):
+            return True
+        # Drop an entry whose file has gone from the cache since.
+        self.downloaded_files.get(self.current_book_id, {}).pop(file_index, None)
+        return self.source.prepare(self, file_index, priority)
+
+    def _growing_uri(self, file_index: int) -> Optional[str]:
+        """A stream of the file's partial download, if enough of it is on disk to start."""
+        growing = self._growing_files.get((self.current_book_id, file_index))
+        if growing and growing.ready(self.min_start_bytes):
+            return f"{GROWING_PROTOCOL}://{self.current_book_id}/{file_index}"
+        return None
+
+    def _stream_url(self, file_index: int) -> Optional[str]:
+        """A media proxy URL for a file; the proxy handles auth and caches what mpv reads."""
+        if not self.book or not 0 <= file_index < len(self.book.media_files):
+            return None
+        cache_key = self.api._get_file_cache_key(self.book.title, file_index)
+        media_file = self.book.media_files[file_index]
+        return self.api.proxy_url(cache_key, media_file.url, media_file.mime_type)
+
+    def _is_streamed(self, file_index: int) -> bool:
+        """
+        Whether mpv would read a file through the media proxy, going by what
+        the media source hands it. A background download of the same file
+        doesn't change that: the stream is what seeks hit until the file is
+        reloaded from disk.
+        """
+        source = self._playable_source(file_index)
+        return bool(source) and self.api.is_proxy_url(source)
+
+    def _index_in_background(self, file_index: int) -> None:
+        """Build a streamed file's seek index off the playback path."""
+        if not self.book or not 0 <= file_index < len(self.book.media_files) or not self._is_streamed(file_index):
+            return
+        cache_key = self.api._get_file_cache_key(self.book.title, file_index)
+        url = self.book.media_files[file_index].url
+        self.prefetch.submit(self.api.seek_index, cache_key, url)
+
+    def _warm_position(self, file_index: int, local_position: float) -> None:
+        """
+        Start fetching the bytes at a seek target of a streamed file into the
+        block cache, so mpv's reads there are served locally. Runs on the
+        prefetch worker; the seek itself never waits on the network.
+        """
+        if not self.book or not 0 <= file_index < len(self.book.media_files) or not self._is_streamed(file_index):
             return
+        # Stop the running prefetch round so the warm goes next.
+        self._prefetch_round += 1
+        self.prefetch.submit(self._warm_target, self.book, file_index, local_position)
 
-        if self._handling_track_end.is_set():
-            print("Already handling track end, ignoring duplicate event")
+    def _warm_target(self, book: PlayBook, file_index: int, local_position: float) -> None:
+        """Fetch seek_warm_bytes at a position, unless another book is loaded first."""
+        def current() -> bool:
+            return self.book is book
+
+        try:
+            if not current():
+                return
+            cache_key = self.api._get_file_cache_key(book.title, file_index)
+            url = book.media_files[file_index].url
+            index = self.api.seek_index(cache_key, url)
+            if index is None or not current():
+                return
+            offset = index.byte_offset(local_position)
+            self.api.ensure_audio_range(cache_key, url, offset, offset + self.seek_warm_bytes, checkpoint=current)
+        except Exception as e:
+            print(f"Error warming seek target: {e}")
+
+    def _read_ahead(self) -> None:
+        """
+        Size mpv's cache to the current speed and start the next file's
+        download once the read-ahead controller says it's due.
+        """
+        if not self.book or not self.book.media_files:
+            return
+        file_index = self.current_file_index
+        if not 0 <= file_index < len(self.book.media_files):
+            return
+        remaining = max(self.book.media_files[file_index].duration - self.track_position, 0.0)
+
+        cache_seconds = self.read_ahead.cache_seconds(self.playback_speed, remaining)
+        if self._cache_seconds != cache_seconds:
+            # Often on mpv's event thread, so queued without waiting
+            self._cache_seconds = cache_seconds
+            self.commands.submit(setattr, self.player, "cache_secs", cache_seconds)
+            self.commands.submit(setattr, self.player, "demuxer_readahead_secs", cache_seconds)
+
+        next_index = file_index + 1
+        key = (self.current_book_id, next_index)
+        if next_index >= len(self.book.media_files) or key == self._read_ahead_started:
+            return
+        if self._downloaded_path(next_index):
             return
+        if self.read_ahead.should_start_next(remaining, self.playback_speed,
+                                             self.book.media_files[next_index].bytes):
+            self._read_ahead_started = key
+            self._download_file(next_index, wait=False)
+
+    def _predict_seek_targets(self, position: float) -> List[float]:
+        """Global positions the user is likely to seek to next, most likely first."""
+        targets = []
+        chapters = self.book.chapters_metadata
+        chapter_index = self._get_chapter_from_position(position)
+        if 0 <= chapter_index + 1 < len(chapters):
+            targets.append(chapters[chapter_index + 1].start)
+        if 0 <= chapter_index < len(chapters):
+            # previous_chapter() returns to the current chapter's start first
+            targets.append(chapters[chapter_index].start)
+        targets.append(min(position + SKIP_FORWARD_SECONDS, self.book.duration))
+        targets.append(max(position - SKIP_BACKWARD_SECONDS, 0.0))
+        if 0 <= chapter_index - 1 < len(chapters):
+            targets.append(chapters[chapter_index - 1].start)
+        return targets
+
+    def _schedule_prefetch(self) -> None:
+        """Start a prefetch round around the current position, superseding any running one."""
+        if not self.book:
+            return
+        self._prefetch_round += 1
+        self._prefetch_anchor = self.global_position
+        targets = self._predict_seek_targets(self.global_position)
+        # Rounds queue behind each other; superseded ones return at once.
+        self.prefetch.submit(self._prefetch_targets, self.book, self._prefetch_round, targets)
+
+    def _prefetch_targets(self, book: PlayBook, round_id: int, targets: List[float]) -> None:
+        """Warm the start of each target within the round's budget."""
+        def current() -> bool:
+            return self.book is book and self._prefetch_round == round_id
+
+        budget = self.prefetch_budget_bytes
+        warmed = set()
         try:
-            self._handling_track_end.set()
-            with threading.Lock():
-                next_file_index = self.current_file_index + 1
-                if next_file_index < len(self.book.media_files):
-                    print(f"Track ended, moving to next file (index: {next_file_index})")
-                    
-                    file_path = None
-                    if self.current_book_id in self.downloaded_files:
-                        file_path = self.downloaded_files[self.current_book_id].get(next_file_index)
-                
-                    if not file_path:
-                        print("Next file not yet downloaded, loading...")
-                        success = self._download_file(next_file_index, wait=True)
-                        if not success:
-                            print("Failed to download next file, stopping playback.")
-                            self._handle_playback_end()
-                            return
-                        file_path = self.downloaded_files[self.current_book_id].get(next_file_index)
+            for target in targets:
+                if budget < self.seek_warm_bytes or not current():
+                    return
+                file_index, local_position = self._get_file_from_position(target)
+                if not self._is_streamed(file_index):
+                    # On disk, or downloading and read from the partial file
+                    continue
+
+                cache_key = self.api._get_file_cache_key(book.title, file_index)
+                url = book.media_files[file_index].url
+                index = self.api.seek_index(cache_key, url)
+                if index is None or not current():
+                    continue
+                offset = index.byte_offset(local_position)
+                if (file_index, offset // self.seek_warm_bytes) in warmed:
+                    continue
+                warmed.add((file_index, offset // self.seek_warm_bytes))
+
+                self.api.ensure_audio_range(cache_key, url, offset, offset + self.seek_warm_bytes, checkpoint=current)
+                budget -= self.seek_warm_bytes
+        except Exception as e:
+            print(f"Error prefetching seek targets: {e}")
 
-                    self.current_file_index = next_file_index
-                    self.track_position = 0.0
+    def _wait_for_download_start(self, file_index: int, priority: int) -> bool:
+        """Queue a download and block until min_start_bytes of it are on disk."""
+        self._download_file(file_index, priority=priority)
+        with self.download_lock:
+            growing = self._growing_files.get((self.current_book_id, file_index))
+        if growing is None:
+            # Already finished (or failed) by the time we looked.
+            return self._downloaded_path(file_index) is not None
+
+        growing.wait_for(self.min_start_bytes)
+        return growing.ready(self.min_start_bytes)
+
+    def _set_property(self, name: str, value, confirm: bool = True) -> None:
+        """Set an mpv property; with `confirm`, wait until mpv reports the new value."""
+        until = None
+        if confirm and name == "pause":
+            until = lambda: self.state.paused == bool(value)
+        self.commands.call(setattr, self.player, name, value, until=until)
+
+    def _open_source(self, source: str, mode: str = "replace", **options) -> Callable[[], None]:
+        """
+        Queue a source for mpv and return a function that waits until mpv
+        has taken it: for a replace, until mpv has opened the file; an
+        append (also done from mpv's event thread) has nothing to wait for.
+        """
+        if mode == "append":
+            self.commands.submit(self.player.playlist_append, source)
+            return lambda: None
+
+        loads = self.state.file_loads
+        future = self.commands.submit(self.player.loadfile, source, **options)
+        return lambda: self.commands.wait(future, "loadfile", until=lambda: self.state.file_loads > loads)
+
+    def _open_growing_stream(self, uri: str) -> GrowingFileReader:
+        """Open an absgrowing:// URI for mpv."""
+        book_id, _, file_index = uri.split("://", 1)[1].rpartition("/")
+        key = (book_id, int(file_index))
+        with self.download_lock:
+            growing = self._growing_files.get(key)
 
-                    file_offset = self._get_file_offset(self.current_file_index)
-                    self.global_position = file_offset                
+        if growing is None:
+            # The download finished in the meantime; read the cached file.
+            path = self.downloaded_files.get(book_id, {}).get(key[1])
+            if not path or not os.path.exists(path):
+                raise ValueError(f"Nothing to play for {uri}")
+            growing = GrowingFile(path)
+            growing.finish(True, path)
 
-                    def play_next_file():
-                        try:
-                            print(f"Playing next file: {file_path}")
-                            self.player.play(file_path)
+        try:
+            return GrowingFileReader(growing)
+        except FileNotFoundError:
+            # Renamed into place between the lookup and the open; let finish() catch up.
+            growing.wait_for(float('inf'))
+            return GrowingFileReader(growing)
+
+    def _book_downloads(self, book_id: str) -> Dict[int, str]:
+        """
+        The downloaded files recorded for a book, marking it recently used.
+        Past max_tracked_books the least recently used book (never the
+        current one) is forgotten; its files stay in the audio cache and
+        are found again by _register_cached_files when it's reopened.
+        """
+        with self._downloaded_lock:
+            files = self.downloaded_files.get(book_id)
+            if files is None:
+                files = self.downloaded_files[book_id] = {}
+            self.downloaded_files.move_to_end(book_id)
+
+            while len(self.downloaded_files) > self.max_tracked_books:
+                oldest = next(key for key in self.downloaded_files if key != self.current_book_id)
+                del self.downloaded_files[oldest]
+            return files
+
+    def _register_cached_files(self) -> None:
+        """Record files of the current book that are already in the audio cache."""
+        files = self._book_downloads(self.current_book_id)
+        for file_index in range(len(self.book.media_files)):
+            if file_index in files:
+                continue
+            cached_path = self.api._get_audio_path(self.api._get_file_cache_key(self.book.title, file_index))
+            if cached_path:
+                files[file_index] = str(cached_path)
 
-                            time.sleep(1.0)
+    def _timeline_source(self) -> Optional[str]:
+        """An EDL joining every file of the book, or None until all of them are downloaded."""
+        if not self.use_timeline or not self.book or len(self.book.media_files) < 2:
+            return None
 
-                            if os.path.basename(self.player.path) != os.path.basename(file_path):
-                                print("Warning: Next file did not load properly")
-                                self.player.play(file_path)
+        segments = []
+        for file_index, audio_file in enumerate(self.book.media_files):
+            path = self._downloaded_path(file_index)
+            if not path:
+                return None
+            # %length% quoting keeps commas and semicolons in paths intact.
+            segments.append(f"%{len(path.encode('utf-8'))}%{path},0,{audio_file.duration}")
+        return "edl://" + ";".join(segments)
+
+    def _load_media(self, file_index: int, local_position: float) -> None:
+        """Load the book into mpv, starting at a position within `file_index`."""
+        timeline = self._timeline_source()
+        if timeline:
+            source = timeline
+            start = self._get_file_offset(file_index) + local_position
+        else:
+            source = self._playable_source(file_index)
+            start = local_position
+            if not source:
+                raise RuntimeError(f"File {file_index} is not downloaded")
+
+        with self._playlist_lock:
+            self.timeline_active = bool(timeline)
+            self._loaded_source = source
+            self._playlist_start = file_index
+            self._playlist_end = len(self.book.media_files) if timeline else file_index + 1
+            self._playlist_sources = {} if timeline else {file_index: source}
+            # Starting at the position avoids a separate seek once the file is open.
+            # Queued under the lock, so no append lands ahead of it; waited for
+            # outside it, so _extend_playlist (on mpv's event thread and the
+            # download workers) doesn't stall behind a slow load.
+            wait_until_open = self._open_source(source, start=f"{max(start, 0.0):.3f}")
+
+        wait_until_open()
+        self._extend_playlist()
+
+    def _extend_playlist(self) -> None:
+        """
+        Append the file after the current one to the playlist once it's playable,
+        so mpv can prefetch it. Only one file ahead, so the source is picked late.
+        """
+        if not self.book or self.timeline_active or self._loaded_source is None:
+            return
 
-                            print(f"Successfully started playing next file {next_file_index}")
-                        except Exception as e:
-                            print(f"Error starting next file: {e}")
-                            self._handle_playback_end()
+        with self._playlist_lock:
+            while (self._playlist_end < len(self.book.media_files)
+                   and self._playlist_end <= self.current_file_index + 1):
+                source = self._playable_source(self._playlist_end)
+                if not source:
+                    break
+                self._open_source(source, mode="append")
+                self._playlist_sources[self._playlist_end] = source
+                self._playlist_end += 1
+
+    def _on_backend_restart(self) -> None:
+        """The mpv subprocess was restarted (IPC backend); reload what was playing."""
+        if not self.book or self._loaded_source is None:
+            return
+        self._loaded_source = None
+        self.timeline_active = False
+        if self.playing:
+            # Called on the IPC reader thread, which must not wait on mpv.
+            self.control.submit(self._resume_after_restart)
 
-                    threading.Thread(target=play_next_file, daemon=True).start()
-                    self._download_file(next_file_index + 1, wait=False)
+    def _resume_after_restart(self) -> None:
+        try:
+            self._load_media(self.current_file_index, self.track_position)
+            self._set_property("pause", bool(self.paused))
+        except Exception as e:
+            print(f"Error resuming playback after mpv restart: {e}")
 
-                    if self.on_file_change:
-                        self.on_file_change(next_file_index)
-                else:
-                    # End of book
+    def _queue_track_end(self) -> None:
+        """Handle a track end on the control worker, once per end (EOF and idle may both fire)."""
+        if self._handling_track_end.is_set():
+            print("Already handling track end, ignoring duplicate event")
+            return
+        self._handling_track_end.set()
+        self.control.submit(self._handle_track_end)
+
+    def _handle_track_end(self) -> None:
+        """Handle end of current track; runs on `control`, one at a time with cross-file seeks."""
+        try:
+            if not self.book or self._stop_requested:
+                return
+            generation = self._load_generation
+            next_file_index = self.current_file_index + 1
+            if self.timeline_active:
+                # The timeline covers the whole book.
+                self._handle_playback_end()
+            elif next_file_index < len(self.book.media_files):
+                # Reached only when the next file wasn't downloaded in time to
+                # be appended to the playlist; otherwise mpv moves on by itself.
+                print(f"Track ended, moving to next file (index: {next_file_index})")
+
+                success = self._prepare_file(next_file_index, PRIORITY_PLAYBACK)
+                if generation != self._load_generation:
+                    # Another book was loaded while we waited.
+                    return
+                if not success:
+                    print("Failed to download next file, stopping playback.")
                     self._handle_playback_end()
+                    return
+
+                self.current_file_index = next_file_index
+                self.track_position = 0.0
+                self.global_position = self._get_file_offset(self.current_file_index)
+                self._last_reported_position = None
+
+                try:
+                    self._load_media(next_file_index, 0.0)
+                    self._set_property("pause", False)
+                except Exception as e:
+                    print(f"Error starting next file: {e}")
+                    self._handle_playback_end()
+                    return
+
+                self._read_ahead()
+
+                if self.on_file_change:
+                    self.on_file_change(next_file_index)
+            else:
+                # End of book
+                self._handle_playback_end()
         finally:
             self._handling_track_end.clear()
 
@@ -609,66 +1424,203 @@ class Player:
         if self.on_playback_end:
             self.on_playback_end()
 
+    def _build_position_index(self) -> None:
+        """Precompute cumulative file offsets and chapter starts for the loaded book."""
+        self._indexed_book = self.book
+        self._file_offsets = [0.0]
+        self._chapter_starts = []
+        if not self.book:
+            return
+
+        for file in self.book.media_files:
+            self._file_offsets.append(self._file_offsets[-1] + file.duration)
+        self._chapter_starts = [chapter.start for chapter in self.book.chapters_metadata]
+
+    def _ensure_position_index(self) -> None:
+        if self._indexed_book is not self.book:
+            self._build_position_index()
+
     def _get_file_from_position(self, position: float) -> Tuple[int, float]:
         """Convert a global position to a file index and local position"""
         if not self.book or not self.book.media_files:
             return 0, 0.0
 
-        current_offset = 0.0
-        for i, file in enumerate(self.book.media_files):
-            file_end = current_offset + file.duration
-            if position < file_end or i == len(self.book.media_files) - 1:
-                # This is the file we want
-                local_position = position - current_offset
-                return i, local_position
-            current_offset = file_end
-
-        return len(self.book.media_files) - 1, 0.0
+        self._ensure_position_index()
+        # _file_offsets[i] is where file i starts; the last file takes anything past the end.
+        last_index = len(self.book.media_files) - 1
+        index = min(max(bisect_right(self._file_offsets, position) - 1, 0), last_index)
+        return index, position - self._file_offsets[index]
 
     def _get_file_offset(self, file_index: int) -> float:
         """Get the global position offset for the start of a file."""
         if not self.book or not self.book.media_files:
             return 0.0
 
-        offset = 0.0
-        for i in range(file_index):
-            if i < len(self.book.media_files):
-                offset += self.book.media_files[i].duration
-
-        return offset
+        self._ensure_position_index()
+        file_index = min(max(file_index, 0), len(self._file_offsets) - 1)
+        return self._file_offsets[file_index]
 
     def _get_chapter_from_position(self, position: float) -> int:
         """Find the current chapter index for a given global position"""
         if not self.book or not self.book.chapters_metadata:
             return 0
 
-        #print(self.book.chapters_metadata)
-        for i, chapter in enumerate(self.book.chapters_metadata):
-            if chapter.start <= position < chapter.end or i == len(self.book.chapters_metadata):
-                return i
-
-        return 0
+        self._ensure_position_index()
+        # Positions past the last chapter's end stay in the last chapter.
+        index = bisect_right(self._chapter_starts, position) - 1
+        return min(max(index, 0), len(self._chapter_starts) - 1)
 
     def _start_download_worker(self):
-        """Start a background thread to process download queue."""
+        """Start the background threads that process the download queue."""
         def worker():
             while True:
                 try:
                     # Get next download task
-                    task = self.download_queue.get()
+                    priority, _sequence, task = self.download_queue.get()
                     if task is None:
                         break
 
-                    book_id, file_index, callback = task
-                    self._process_download(book_id, file_index, callback)
+                    if self._claim_download(task, priority):
+                        self._run_download(task)
 
                     # Mark as done
                     self.download_queue.task_done()
                 except Exception as e:
                     print(f"Error in download worker: {e}")
 
-        self.download_thread = threading.Thread(target=worker, daemon=True)
-        self.download_thread.start()
+        for _ in range(self.download_workers):
+            thread = threading.Thread(target=worker, daemon=True)
+            thread.start()
+            self.download_threads.append(thread)
+
+    def _queue_task(self, task: DownloadTask) -> None:
+        """Put a task on the priority queue. Caller holds download_lock."""
+        self.download_queue.put((task.priority, next(self._download_sequence), task))
+
+    def _has_urgent_downloads(self, waiting_only: bool = False) -> bool:
+        """Whether any download more urgent than a prefetch is pending. Caller holds download_lock."""
+        return any(
+            task.priority < PRIORITY_PREFETCH and not (waiting_only and task.started)
+            for task in self._download_tasks.values()
+        )
+
+    def _schedule_download(self, book: PlayBook, file_index: int, priority: int,
+                           callback: Optional[Callable[[bool], None]] = None) -> None:
+        """Queue a download, or promote the one already queued for this file."""
+        key = (book.libraryItemId, file_index)
+        with self.download_lock:
+            task = self._download_tasks.get(key)
+            if task is not None and task.generation != self._load_generation:
+                # Queued before the book was reopened; report its progress again.
+                task.generation = self._load_generation
+            if task is None:
+                task = DownloadTask(book, file_index, priority, self._load_generation)
+                cache_key = self.api._get_file_cache_key(book.title, file_index)
+                task.growing = GrowingFile(str(self.api._new_partial_audio_path(cache_key)))
+                self._growing_files[key] = task.growing
+                self._download_tasks[key] = task
+                self._queue_task(task)
+            elif priority < task.priority:
+                task.priority = priority
+                if task.started:
+                    task.resume.set()
+                else:
+                    self._queue_task(task)
+
+            if callback:
+                task.callbacks.append(callback)
+
+            if priority < PRIORITY_PREFETCH:
+                self._preempt_prefetches()
+
+    def _cancel_downloads(self, keep_book_id: Optional[str] = None) -> None:
+        """
+        Cancel queued and running downloads for every book but `keep_book_id`.
+        Running transfers stop at their next checkpoint and delete the partial file.
+        """
+        callbacks = []
+        with self.download_lock:
+            for key, task in list(self._download_tasks.items()):
+                if task.book_id == keep_book_id:
+                    continue
+                task.cancelled = True
+                task.resume.set()
+                del self._download_tasks[key]
+                self._growing_files.pop(key, None)
+                task.growing.finish(False)
+                callbacks.extend(task.callbacks)
+                task.callbacks = []
+
+            if not self._has_urgent_downloads():
+                for task in self._download_tasks.values():
+                    task.resume.set()
+
+        for callback in callbacks:
+            callback(False)
+
+    def _preempt_prefetches(self) -> None:
+        """Pause running prefetches; abort one if urgent work has no free worker. Caller holds download_lock."""
+        running = [
+            task for task in self._download_tasks.values()
+            if task.started and not task.aborted and task.priority >= PRIORITY_PREFETCH
+        ]
+        for task in running:
+            task.resume.clear()
+
+        if running and self._active_downloads >= self.download_workers and self._has_urgent_downloads(waiting_only=True):
+            victim = running[-1]
+            victim.aborted = True
+            victim.resume.set()
+
+    def _claim_download(self, task: DownloadTask, priority: int) -> bool:
+        """Mark a dequeued task as running, unless the queue entry is stale."""
+        with self.download_lock:
+            if task.started or task.cancelled or task.priority != priority:
+                return False
+            if self._download_tasks.get((task.book_id, task.file_index)) is not task:
+                return False
+
+            task.started = True
+            self._active_downloads += 1
+            self.is_downloading = True
+            if task.priority >= PRIORITY_PREFETCH and self._has_urgent_downloads():
+                task.resume.clear()
+            return True
+
+    def _run_download(self, task: DownloadTask) -> None:
+        """Run a claimed task and notify whoever is waiting on it."""
+        success = self._process_download(task)
+        requeue = task.aborted and not success and not task.cancelled
+        if requeue:
+            task.growing.reset()
+        elif not task.cancelled:
+            task.growing.finish(success, self.downloaded_files.get(task.book_id, {}).get(task.file_index))
+
+        with self.download_lock:
+            self._active_downloads -= 1
+            self.is_downloading = self._active_downloads > 0
+
+            if task.cancelled:
+                # _cancel_downloads already dropped it and released its waiters.
+                return
+
+            if requeue:
+                # Preempted: back in the queue behind the urgent work.
+                task.started = False
+                task.aborted = False
+                task.resume.set()
+                self._queue_task(task)
+                return
+
+            self._download_tasks.pop((task.book_id, task.file_index), None)
+            self._growing_files.pop((task.book_id, task.file_index), None)
+            callbacks = task.callbacks
+            if not self._has_urgent_downloads():
+                for other in self._download_tasks.values():
+                    other.resume.set()
+
+        for callback in callbacks:
+            callback(success)
 
     def _match_cache_key(self, book_id, file_index: int) -> bool:
         current_key = self.downloaded_files[book_id][file_index]
@@ -678,79 +1630,76 @@ class Player:
         else:
             return False
 
-    def _process_download(self, book_id, file_index, completion_callback):
+    def _process_download(self, task: DownloadTask) -> bool:
         """Process a single download task."""
-        with self.download_lock:
-            self.is_downloading = True
-
-        success = False
+        # Use the task's own book; self.book may have moved on since it was queued.
+        book, book_id, file_index = task.book, task.book_id, task.file_index
         try:
-            if not self.book or not self.book.media_files:
+            if task.cancelled or not book.media_files:
                 return False
-            if file_index < 0 or file_index >= len(self.book.media_files):
+            if file_index < 0 or file_index >= len(book.media_files):
                 return False
 
             # Already downloaded in this session?
             if book_id in self.downloaded_files and file_index in self.downloaded_files[book_id]:
-                print("ALRADY DOWNLALDED")
-                success = True
-                if completion_callback:
-                    completion_callback(True)
                 return True
 
-            audio_file = self.book.media_files[file_index]
-            cache_key = self.api._get_file_cache_key(self.book.title, file_index)
+            audio_file = book.media_files[file_index]
+            cache_key = self.api._get_file_cache_key(book.title, file_index)
 
             # Check if in cache already
             cached_path = self.api._get_audio_path(cache_key)
             if cached_path:
-                if book_id not in self.downloaded_files:
-                    self.downloaded_files[book_id] = {}
-                self.downloaded_files[book_id][file_index] = str(cached_path)
-                success = True
-                if completion_callback:
-                    completion_callback(True)
+                self._book_downloads(book_id)[file_index] = str(cached_path)
                 return True
 
             print(f"Downloading file {file_index}")
 
+            last_sample = [time.monotonic(), 0]
+
             def progress_update(downloaded, total):
-                if self.on_download_progress and total > 0:
+                task.growing.update(downloaded, total)
+                # Throughput for the read-ahead controller, in samples of at least half a second
+                now = time.monotonic()
+                if now - last_sample[0] >= 0.5:
+                    self.read_ahead.record(downloaded - last_sample[1], now - last_sample[0])
+                    last_sample[:] = [now, downloaded]
+                if task.generation == self._load_generation and self.on_download_progress and total > 0:
                     progress = (downloaded / total)*100
                     self.on_download_progress(file_index, progress)
 
+            def checkpoint() -> bool:
+                task.resume.wait()
+                return not (task.aborted or task.cancelled)
+
             file_path = self.api.download_audio(
                 cache_key,
                 audio_file.url,
-                progress_callback=progress_update
+                progress_callback=progress_update,
+                checkpoint=checkpoint,
+                partial_path=task.growing.path
             )
 
             if file_path:
-                if book_id not in self.downloaded_files:
-                    self.downloaded_files[book_id] = {}
-                self.downloaded_files[book_id][file_index] = str(file_path)
+                self._book_downloads(book_id)[file_index] = str(file_path)
                 print(f"Downloaded and cached file {file_index} for book {book_id}")
-                success = True
-            else:
+                if book_id == self.current_book_id:
+                    self._extend_playlist()
+                return True
+
+            if not (task.aborted or task.cancelled):
                 print(f"Failed to download file {file_index} for book {book_id}")
-                success = False
+            return False
 
         except Exception as e:
             print(f"Error downloading file {file_index} for book {book_id}: {e}")
-            success = False
-
-        finally:
-            with self.download_lock:
-                self.is_downloading = False
-
-            if completion_callback:
-                completion_callback(success)
-
-            return success
-        
+            return False
 
-    def _download_file(self, file_index: int, wait=False) -> bool:
-        """Queue a file for download, optionally waiting for completion."""
+    def _download_file(self, file_index: int, wait=False, priority: Optional[int] = None) -> bool:
+        """
+        Queue a file for download, optionally waiting for completion.
+        Waited-on downloads default to PRIORITY_PLAYBACK, others to PRIORITY_PREFETCH.
+        """
         if not self.book or not self.book.media_files:
             return False
 
@@ -761,6 +1710,9 @@ class Player:
         if self.current_book_id in self.downloaded_files and file_index in self.downloaded_files[self.current_book_id]:
             return True
 
+        if priority is None:
+            priority = PRIORITY_PLAYBACK if wait else PRIORITY_PREFETCH
+
         if wait:
             result = [None]
             download_event = threading.Event()
@@ -769,14 +1721,14 @@ class Player:
                 result[0]=  success
                 download_event.set()
 
-            self.download_queue.put((self.current_book_id, file_index, completion_callback))
+            self._schedule_download(self.book, file_index, priority, completion_callback)
             download_event.wait()
             if result[0]:
                 return result[0]
             else:
                 return False
         else:
-            self.download_queue.put((self.current_book_id, file_index, None))
+            self._schedule_download(self.book, file_index, priority)
             return True
 
 
@@ -796,13 +1748,13 @@ class Player:
         """Clean up resources when the object is destroyed"""
         try:
             if self.download_queue:
-                self.download_queue.put(None)
+                for _ in self.download_threads:
+                    self.download_queue.put((-1, next(self._download_sequence), None))
             self._stop_requested = True
+            self.commands.shutdown()
+            self.control.shutdown()
+            self.prefetch.shutdown()
             self.player.terminate()
         except:
             pass
-        
-            
-                    
-## TODO
-# self.player.play() is hanging in the 'play' function. Not proceeding past that point.
+
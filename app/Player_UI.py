@@ -1,17 +1,74 @@
-import importlib.resources
-from typing import Optional
-from PyQt6.QtCore import QEvent, QPointF, QPropertyAnimation, QRect, QTimer, QVersionNumber, Qt
+import threading
+from typing import Optional, Tuple
+from PyQt6.QtCore import QAbstractListModel, QEvent, QModelIndex, QObject, QPointF, QPropertyAnimation, QRect, QTimer, QVersionNumber, Qt, pyqtSignal
 from PyQt6.QtGui import QAction, QBrush, QFont, QPainter, QPainterPath, QPixmap
-from PyQt6.QtWidgets import QFrame, QListWidget, QListWidgetItem, QMenu, QProgressBar, QSizePolicy, QSlider, QTextEdit, QWidget, QLabel, QPushButton, QHBoxLayout, QVBoxLayout
+from PyQt6.QtWidgets import QFrame, QListView, QMenu, QProgressBar, QSizePolicy, QSlider, QTextEdit, QWidget, QLabel, QPushButton, QHBoxLayout, QVBoxLayout
 
 from api.api import API
 from app.Player import Player
 
+class PlayerEvents(QObject):
+    """
+    Carries the Player's callbacks onto the GUI thread.
+
+    The player calls back from mpv's event thread and its download workers;
+    the callbacks here only emit signals, which Qt queues to the thread the
+    receivers live in. Position updates are coalesced: only the latest one
+    is kept, and it is delivered at most once per `position_interval_ms`.
+    """
+    position_changed = pyqtSignal(float, int)
+    chapter_changed = pyqtSignal(int)
+    file_changed = pyqtSignal(int)
+    playback_ended = pyqtSignal()
+    # (position, success) of a seek into another file, once it has loaded
+    seek_finished = pyqtSignal(float, bool)
+    _position_ready = pyqtSignal()
+
+    def __init__(self, player: Player, parent=None, position_interval_ms: int = 250):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._latest_position: Optional[Tuple[float, int]] = None
+
+        self._position_timer = QTimer(self)
+        self._position_timer.setSingleShot(True)
+        self._position_timer.setInterval(position_interval_ms)
+        self._position_timer.timeout.connect(self._deliver_position)
+        self._position_ready.connect(self._on_position_ready)
+
+        player.set_position_callback(self._on_position_change)
+        player.set_chapter_callback(self.chapter_changed.emit)
+        player.set_file_callback(self.file_changed.emit)
+        player.set_playback_end_callback(self.playback_ended.emit)
+        player.set_seek_callback(self.seek_finished.emit)
+
+    def _on_position_change(self, position: float, chapter_index: int):
+        # Any thread. Only the first update since the last delivery wakes the GUI thread.
+        with self._lock:
+            first = self._latest_position is None
+            self._latest_position = (position, chapter_index)
+        if first:
+            self._position_ready.emit()
+
+    def _on_position_ready(self):
+        # A delivery already due picks this update up.
+        if not self._position_timer.isActive():
+            self._deliver_position()
+
+    def _deliver_position(self):
+        with self._lock:
+            latest, self._latest_position = self._latest_position, None
+        if latest is not None:
+            self.position_changed.emit(*latest)
+            self._position_timer.start()
+
+
 class PlayerBar(QWidget):
     def __init__(self, player: Player, api: API, parent=None):
         super().__init__(parent)
         self.player = player
         self.api = api
+        # Formatted progress last shown, so unchanged updates skip repainting
+        self._shown_progress = None
         self.setup_ui(parent)
 
         if self.player.book:
@@ -22,16 +79,6 @@ class PlayerBar(QWidget):
     def setup_ui(self, parent):
         self.setObjectName("playerBar")  # Set an object name so we can target this specific widget
 
-        with importlib.resources.path('styles', 'player.qss') as style_path:
-            f = open(style_path, 'r')
-            style = f.read()
-            self.setStyleSheet(style)
-            f.close()        
-
-        ## with open('styles/player.qss', 'r') as f:
-        ##     style = f.read()
-        ##     self.setStyleSheet(style)
-
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
 
@@ -201,11 +248,13 @@ class PlayerBar(QWidget):
         self.progress_bar.mousePressEvent = self.on_progress_bar_click
 
 
-        # Setup callbacks
-        self.player.set_position_callback(self.on_position_change)
-        self.player.set_chapter_callback(self.on_chapter_change)
-        self.player.set_playback_end_callback(self.on_playback_end)
-        self.player.set_file_callback(self.on_file_change)
+        # Setup callbacks; PlayerEvents brings them onto the GUI thread.
+        self.player_events = PlayerEvents(self.player, self)
+        self.player_events.position_changed.connect(self.on_position_change)
+        self.player_events.chapter_changed.connect(self.on_chapter_change)
+        self.player_events.playback_ended.connect(self.on_playback_end)
+        self.player_events.file_changed.connect(self.on_file_change)
+        self.player_events.seek_finished.connect(self.on_seek_finished)
 
     def eventFilter(self, a0, a1) -> bool:
         if a0 == self and a1.type() == QEvent.Type.MouseButtonPress:
@@ -369,19 +418,27 @@ class PlayerBar(QWidget):
         position_str = self.format_time(global_position)
         duration_str = self.format_time(total_duration)
 
-        self.total_progress.setText(f"{position_str} / {duration_str}")
-
+        chapter_progress = None
         current_chapter = self.player.get_current_chapter()
         if current_chapter:
             chapter_position = global_position - current_chapter.start
             chapter_duration = current_chapter.end - current_chapter.start
 
             chapter_progress_percentage = (chapter_position / chapter_duration) * 100 if chapter_duration > 0 else 0
-            self.progress_bar.setValue(int(chapter_progress_percentage))
+            chapter_progress = (int(chapter_progress_percentage),
+                                self.format_time(chapter_position),
+                                self.format_time(chapter_duration))
 
-            chapter_position_str = self.format_time(chapter_position)
-            chapter_duration_str = self.format_time(chapter_duration)
+        # Only repaint when something visible changed (usually once a second).
+        shown = (position_str, duration_str, chapter_progress)
+        if shown == self._shown_progress:
+            return
+        self._shown_progress = shown
 
+        self.total_progress.setText(f"{position_str} / {duration_str}")
+        if chapter_progress:
+            percentage, chapter_position_str, chapter_duration_str = chapter_progress
+            self.progress_bar.setValue(percentage)
             self.chapter_progress_left.setText(chapter_position_str)
             self.chapter_progress_right.setText(chapter_duration_str)
 
@@ -400,10 +457,12 @@ class PlayerBar(QWidget):
 
     def update_play_button_state(self):
         """Update play/pause button based on player state"""
-        if self.player.playing and not self.player.paused:
+        playing = bool(self.player.playing and not self.player.paused)
+        if playing:
             self.play_button.setText("󰏤")
         else:
             self.play_button.setText("󰐊")
+        self.fullscreen_player.rotating_record.set_spinning(playing)
 
     # Callbacks
     def on_position_change(self, position, chapter_index):
@@ -415,6 +474,11 @@ class PlayerBar(QWidget):
         self.update_play_button_state()
     def on_file_change(self, file_index):
         pass # Don't need to do anything AFAIK
+    def on_seek_finished(self, position, success):
+        if success:
+            self.update_progress()
+        else:
+            print(f"Seek to {position:.2f}s failed")
     def on_progress_bar_click(self, event):
         if not self.player.book:
             return
@@ -436,6 +500,7 @@ class PlayerBar(QWidget):
 
     def reset(self):
         self.title_timer.stop()
+        self._shown_progress = None
         self.book_title_label.setText("No book")
         self.chapter_title_label.setText("")
         self.progress_bar.setValue(0)
@@ -446,14 +511,24 @@ class PlayerBar(QWidget):
         self.fullscreen_player.reset()
 
 class RecordCoverArt(QWidget):
+    """
+    The cover art as the label of a spinning record.
+
+    The record (disc, grooves and label) is rendered once per cover and size
+    into a cached pixmap; each frame only blits it rotated. The rotation
+    timer runs only while the widget is visible and playback is spinning.
+    """
+
     def __init__(self, cover_path = None, parent = None):
         super().__init__(parent)
         self.setFixedSize(320,320)
         self.angle = 0
+        self.spinning = False
         self.timer = QTimer(self)
+        self.timer.setInterval(50)
         self.timer.timeout.connect(self.update_rotation)
-        self.timer.start(50)
         self.cover_pixmap = QPixmap(cover_path if cover_path else None)
+        self._record_pixmap: Optional[QPixmap] = None
 
     def update_rotation(self):
         self.angle = (self.angle + 1) % 360
@@ -464,15 +539,41 @@ class RecordCoverArt(QWidget):
             self.cover_pixmap = QPixmap(path)
         else:
             self.cover_pixmap = QPixmap(None)
+        self._record_pixmap = None
         self.update()
 
-    def paintEvent(self, a0):
-        with QPainter(self) as painter:
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def set_spinning(self, spinning: bool):
+        """Spin while playing; stop (and stop the timer) while paused or stopped."""
+        self.spinning = spinning
+        self._update_timer()
 
-            painter.translate(self.width() / 2, self.height() / 2)
-            painter.rotate(self.angle)
-            painter.translate(-self.width()/2, -self.height()/2)
+    def _update_timer(self):
+        if self.spinning and self.isVisible():
+            if not self.timer.isActive():
+                self.timer.start()
+        else:
+            self.timer.stop()
+
+    def showEvent(self, a0):
+        super().showEvent(a0)
+        self._update_timer()
+
+    def hideEvent(self, a0):
+        super().hideEvent(a0)
+        self._update_timer()
+
+    def resizeEvent(self, a0):
+        super().resizeEvent(a0)
+        self._record_pixmap = None
+
+    def _render_record(self) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        with QPainter(pixmap) as painter:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
             radius = min(self.width(), self.height()) // 2
             painter.setBrush(QBrush(Qt.GlobalColor.black))
@@ -496,26 +597,74 @@ class RecordCoverArt(QWidget):
                 path = QPainterPath()
                 path.addEllipse(center, label_size / 2, label_size/2)
                 painter.setClipPath(path)
-            
-                scaled = self.cover_pixmap.scaled(label_size, label_size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+
+                scaled = self.cover_pixmap.scaled(int(label_size * ratio), int(label_size * ratio),
+                                                  Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                                                  Qt.TransformationMode.SmoothTransformation)
                 painter.drawPixmap(int(center.x() - label_size/2),
                                 int(center.y() - label_size/2),
                                 label_size, label_size, scaled)
                 painter.setClipping(False)
 
+        return pixmap
+
+    def paintEvent(self, a0):
+        if self._record_pixmap is None:
+            self._record_pixmap = self._render_record()
+
+        with QPainter(self) as painter:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+            painter.translate(self.width() / 2, self.height() / 2)
+            painter.rotate(self.angle)
+            painter.translate(-self.width()/2, -self.height()/2)
+
+            painter.drawPixmap(0, 0, self._record_pixmap)
+
+
+class ChapterListModel(QAbstractListModel):
+    """
+    A book's chapters for the chapter list, read straight from its
+    chapters_metadata. Chapter 0 isn't listed, so row r is chapter
+    r + FIRST_CHAPTER and mapping either way is arithmetic.
+    """
+    FIRST_CHAPTER = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._chapters = []
+
+    def set_chapters(self, chapters):
+        self.beginResetModel()
+        self._chapters = chapters or []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return max(len(self._chapters) - self.FIRST_CHAPTER, 0)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self.rowCount():
+            return None
+        chapter_index = index.row() + self.FIRST_CHAPTER
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._chapters[chapter_index].title
+        if role == Qt.ItemDataRole.UserRole:
+            return chapter_index
+        return None
+
+    def index_for_chapter(self, chapter_index: int) -> QModelIndex:
+        row = chapter_index - self.FIRST_CHAPTER
+        if 0 <= row < self.rowCount():
+            return self.index(row)
+        return QModelIndex()
+
 
 class PlayerFullScreen(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("fullscreenPlayer")
-        ## with open('styles/player.qss') as f:
-        ##     style = f.read()
-        ##     self.setStyleSheet(style)
-        with importlib.resources.path('styles', 'player.qss') as style_path:
-            f = open(style_path, 'r')
-            style = f.read()
-            self.setStyleSheet(style)
-            f.close()        
         self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
 
         main_layout = QHBoxLayout()
@@ -551,8 +700,13 @@ class PlayerFullScreen(QWidget):
         chapters_header.setObjectName("chaptersHeader")
         chapters_header.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.chapters_list = QListWidget()
+        self.chapters_model = ChapterListModel(self)
+        self.chapters_list = QListView()
         self.chapters_list.setObjectName("chaptersList")
+        self.chapters_list.setModel(self.chapters_model)
+        # Every row is one line of text; lets the view skip measuring each one.
+        self.chapters_list.setUniformItemSizes(True)
+        self.chapters_list.clicked.connect(self.on_chapter_selected)
         self.chapters_list.setFixedWidth(350)
         self.chapters_list.setMinimumHeight(400)
 
@@ -581,8 +735,6 @@ class PlayerFullScreen(QWidget):
             self.title_label.setText(book.title)
             self.author_label.setText(book.author)
 
-            self.chapters_list.clear()
-
             if hasattr(book, 'cover_path') and book.cover_path:
                 pixmap = QPixmap(book.cover_path)
                 if not pixmap.isNull():
@@ -597,35 +749,28 @@ class PlayerFullScreen(QWidget):
                     #self.cover_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
                     self.rotating_record.set_cover_art(book.cover_path)
 
-            for i, chapter in enumerate(book.chapters_metadata):
-                if i > 0:
-                    item = QListWidgetItem(chapter.title)
-                    item.setData(Qt.ItemDataRole.UserRole, i)
-                    self.chapters_list.addItem(item)
+            self.chapters_model.set_chapters(book.chapters_metadata)
 
             current_chapter = self.parent().player.current_chapter_index
             self.update_current_chapter(current_chapter)
 
-            self.chapters_list.itemClicked.connect(self.on_chapter_selected)
-
     def update_current_chapter(self, chapter_index):
         """Update the selected chapter in the list"""
-        for i in range(self.chapters_list.count()):
-            item = self.chapters_list.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == chapter_index:
-                self.chapters_list.setCurrentItem(item)
-                break
+        index = self.chapters_model.index_for_chapter(chapter_index)
+        if index.isValid():
+            self.chapters_list.setCurrentIndex(index)
 
-    def on_chapter_selected(self, item):
+    def on_chapter_selected(self, index):
         """Handle chapter selection from list"""
-        chapter_index = item.data(Qt.ItemDataRole.UserRole)
+        chapter_index = index.data(Qt.ItemDataRole.UserRole)
         if chapter_index is not None:
             self.parent().player.seek_to_chapter(chapter_index)
 
     def reset(self):
         self.title_label.setText("No Book")
         self.author_label.setText("")
-        self.chapters_list.clear()
+        self.chapters_model.set_chapters([])
+        self.rotating_record.set_spinning(False)
         self.rotating_record.set_cover_art()
             
                         
@@ -0,0 +1,73 @@
+import importlib.resources
+import re
+from functools import lru_cache
+
+from PyQt6.QtWidgets import QApplication
+
+# Each screen used to call setStyleSheet with its own file, which Qt re-parsed
+# for every instance. The files are now merged into one application
+# stylesheet, with each file's rules scoped to the object name of the widget
+# it used to be set on.
+THEME_BUNDLE = [
+    ("loginScreen", "login.qss"),
+    ("homeScreen", "home.qss"),
+    ("bookScreen", "book_detail.qss"),
+    ("playerBar", "player.qss"),
+    ("fullscreenPlayer", "player.qss"),
+]
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+# A lone universal/QWidget selector, optionally with a pseudo-state.
+_ROOT_SELECTOR = re.compile(r"^(\*|QWidget)((?::[\w-]+)*)$")
+
+
+@lru_cache(maxsize=None)
+def load_stylesheet(name: str) -> str:
+    """Read a stylesheet from the styles package, once per process."""
+    with importlib.resources.path('styles', name) as style_path:
+        with open(style_path, 'r') as f:
+            return f.read()
+
+
+def _scope_selector(selector: str, scope: str) -> str:
+    """Restrict a selector to the widget named `scope` and its children."""
+    if re.search(rf"#{scope}\b", selector):
+        return selector
+
+    scoped = [f"#{scope} {selector}"]
+
+    # Rules like `QWidget { ... }` also applied to the widget itself when the
+    # sheet was set on it directly.
+    root = _ROOT_SELECTOR.match(selector)
+    if root:
+        widget_type = "" if root.group(1) == "*" else root.group(1)
+        scoped.append(f"{widget_type}#{scope}{root.group(2)}")
+
+    return ", ".join(scoped)
+
+
+def scope_stylesheet(stylesheet: str, scope: str) -> str:
+    """Rewrite every rule in a stylesheet so it only matches under `scope`."""
+    rules = []
+    for selectors, body in _RULE.findall(_COMMENT.sub("", stylesheet)):
+        scoped = ", ".join(
+            _scope_selector(selector.strip(), scope)
+            for selector in selectors.split(",") if selector.strip()
+        )
+        rules.append(f"{scoped} {{{body}}}")
+    return "\n".join(rules)
+
+
+@lru_cache(maxsize=None)
+def application_stylesheet() -> str:
+    """The whole theme bundle as a single stylesheet."""
+    return "\n".join(
+        scope_stylesheet(load_stylesheet(name), scope)
+        for scope, name in THEME_BUNDLE
+    )
+
+
+def apply_theme(app: QApplication):
+    """Install the theme once for the whole application."""
+    app.setStyleSheet(application_stylesheet())
@@ -0,0 +1,66 @@
+"""API's session closing and block cache bookkeeping; no server needed."""
+import threading
+
+import pytest
+
+from api.api import API
+from api.session import Session
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    return API("http://127.0.0.1:1")
+
+
+def make_session(number):
+    return Session.from_dict({"id": f"session-{number}", "userId": "user", "libraryId": "library",
+                              "libraryItemId": f"item-{number}"})
+
+
+def test_sessions_close_concurrently(api, monkeypatch):
+    # Every close waits for all the others: only passes if they run at the same time.
+    barrier = threading.Barrier(3, timeout=5)
+    closed = []
+
+    def close_session(session_id):
+        barrier.wait()
+        closed.append(session_id)
+    monkeypatch.setattr(api, "close_session", close_session)
+
+    for number in range(3):
+        session = make_session(number)
+        api.sessions[session.libraryItemId] = session
+    api.close_open_sessions()
+
+    assert sorted(closed) == ["session-0", "session-1", "session-2"]
+    assert not api.sessions
+
+
+def test_stale_session_is_closed(api, monkeypatch):
+    closed = threading.Event()
+    monkeypatch.setattr(api, "close_session", lambda session_id: closed.set())
+
+    api._open_session(make_session(0))
+    api._open_session(make_session(1))
+
+    assert closed.wait(5)
+    assert list(api.sessions) == ["item-1"]
+
+
+def test_cleanup_leaves_sparse_lru_alone(api):
+    api.max_sparse_files = 2
+    for number in range(4):
+        sparse = api.sparse_audio(f"key{number}")
+        sparse.set_size(16)
+        sparse.write_block(0, b"x" * 16)
+    before = list(api._sparse_files)
+
+    api._cleanup_cache_if_needed()
+    assert list(api._sparse_files) == before
+
+    # Over the limit: blocks are evicted, whether or not their file is in the LRU
+    api.max_cache_size_gb = 0
+    api._cleanup_cache_if_needed()
+    assert list(api._sparse_files) == before
+    assert all(not api._peek_sparse_audio(f"key{number}").present_blocks() for number in range(4))
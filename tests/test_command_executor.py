@@ -0,0 +1,61 @@
+"""CommandExecutor; needs neither mpv nor Qt."""
+import threading
+import time
+
+import pytest
+
+from app.Player import CommandExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = CommandExecutor("test", timeout=1.0)
+    yield executor
+    executor.shutdown()
+
+
+def test_runs_calls_in_order(executor):
+    calls = []
+    for i in range(20):
+        executor.submit(calls.append, i)
+    executor.call(lambda: None)
+    assert calls == list(range(20))
+
+
+def test_call_returns_and_raises(executor):
+    assert executor.call(lambda a, b=0: a + b, 1, b=2) == 3
+
+    def fail():
+        raise RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        executor.call(fail)
+
+
+def test_submit_from_worker_runs_inline(executor):
+    def outer():
+        return executor.submit(lambda: threading.current_thread().name).result(timeout=0)
+    assert executor.call(outer) == "test"
+
+
+def test_call_times_out(executor):
+    release = threading.Event()
+    executor.submit(release.wait)
+    with pytest.raises(TimeoutError):
+        executor.call(lambda: None, timeout=0.1)
+    release.set()
+
+
+def test_call_waits_for_confirmation(executor):
+    state = {"loaded": False}
+
+    def confirm():
+        time.sleep(0.05)
+        state["loaded"] = True
+        executor.notify()
+
+    threading.Thread(target=confirm).start()
+    executor.call(lambda: None, until=lambda: state["loaded"])
+    assert state["loaded"]
+
+    with pytest.raises(TimeoutError):
+        executor.call(lambda: None, until=lambda: False, timeout=0.1)
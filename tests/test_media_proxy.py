@@ -0,0 +1,162 @@
+"""MediaProxy against a local upstream that serves byte ranges."""
+import os
+import re
+import socket
+import struct
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from api.api import API
+from api.media_proxy import content_type_for
+
+DATA = os.urandom(1_000_000)
+
+
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        start = int(match.group(1)) if match else 0
+        end = int(match.group(2)) if match and match.group(2) else len(DATA) - 1
+        self.requests.append((start, end))
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(DATA[start:end + 1])
+
+
+class UpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The proxy hangs up on a fetch its client abandoned; that's expected.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+@pytest.fixture(scope="module")
+def upstream():
+    server = UpstreamServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def api(upstream, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    api = API(upstream)
+    api.set_token("token")
+    Upstream.requests = []
+    yield api
+    if api.media_proxy:
+        api.media_proxy.stop()
+
+
+def get(url, range_header=None):
+    headers = {"Range": range_header} if range_header else {}
+    return httpx.get(url, headers=headers)
+
+
+def test_range_fetches_missing_blocks(api):
+    url = api.proxy_url("key", "/audio/book.mp3")
+    response = get(url, "bytes=500000-599999")
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 500000-599999/{len(DATA)}"
+    assert response.content == DATA[500000:600000]
+    assert Upstream.requests
+
+    # Served from the block cache the second time
+    Upstream.requests = []
+    assert get(url, "bytes=500000-500099").content == DATA[500000:500100]
+    assert Upstream.requests == []
+
+
+def test_whole_file_without_range(api):
+    response = get(api.proxy_url("key", "/audio/book.mp3"))
+    assert response.status_code == 200
+    assert "Content-Range" not in response.headers
+    assert response.content == DATA
+
+
+def test_suffix_range(api):
+    response = get(api.proxy_url("key", "/audio/book.mp3"), "bytes=-100")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes {len(DATA) - 100}-{len(DATA) - 1}/{len(DATA)}"
+    assert response.content == DATA[-100:]
+
+
+def test_unsatisfiable_range(api):
+    response = get(api.proxy_url("key", "/audio/book.mp3"), f"bytes={len(DATA)}-")
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(DATA)}"
+
+
+def test_cached_file(api):
+    api.audio_cache_dir.mkdir(parents=True, exist_ok=True)
+    (api.audio_cache_dir / "key.mp3").write_bytes(DATA)
+    url = api.proxy_url("key", "/audio/book.mp3")
+
+    response = get(url, "bytes=10-20")
+    assert response.status_code == 206
+    assert response.content == DATA[10:21]
+    assert get(url, "bytes=-5").content == DATA[-5:]
+    assert Upstream.requests == []
+
+
+def test_rejects_other_paths(api):
+    url = api.proxy_url("key", "/audio/book.mp3")
+    assert api.is_proxy_url(url)
+
+    wrong_secret = url.replace(api.media_proxy.secret, "guess")
+    assert not api.is_proxy_url(wrong_secret)
+    assert get(wrong_secret).status_code == 404
+    assert get(url.replace("key.mp3", "other.mp3")).status_code == 404
+    assert Upstream.requests == []
+
+
+def test_content_type(api):
+    url = api.proxy_url("book", "/audio/book.m4b")
+    assert get(url, "bytes=0-9").headers["Content-Type"] == "audio/mp4"
+
+    assert content_type_for("/audio/a.mp3") == "audio/mpeg"
+    assert content_type_for("/audio/a.M4A?token=x") == "audio/mp4"
+    assert content_type_for("/audio/a.m4b", "audio/x-m4b") == "audio/x-m4b"
+
+
+def test_client_disconnect_is_quiet(api, capfd):
+    url = api.proxy_url("key", "/audio/book.mp3")
+    host, port = api.media_proxy.server.server_address[:2]
+    path = url.split(f"{port}", 1)[1]
+
+    # Hang up mid-body with a reset, as mpv does when it seeks elsewhere
+    with socket.create_connection((host, port)) as sock:
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+        sock.recv(1024)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    # The proxy still serves afterwards
+    assert get(url, "bytes=0-9").content == DATA[:10]
+
+    assert "Traceback" not in capfd.readouterr().err
+
+
+def test_server_ignores_disconnect_errors(api, capfd):
+    api.proxy_url("key", "/audio/book.mp3")
+    server = api.media_proxy.server
+    for error in (ConnectionResetError(), BrokenPipeError(), ConnectionAbortedError()):
+        try:
+            raise error
+        except ConnectionError:
+            server.handle_error(None, ("127.0.0.1", 0))
+    assert capfd.readouterr().err == ""
@@ -0,0 +1,90 @@
+"""MpvIpc against a stand-in mpv process that speaks the JSON IPC protocol."""
+import os
+import sys
+import threading
+
+import pytest
+
+from app.MpvIpc import MpvIpc
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="MpvIpc uses Unix sockets")
+
+# Answers every command except "hang", which it ignores.
+FAKE_MPV = """
+import json, os, socket, sys
+path = [a.split("=", 1)[1] for a in sys.argv if a.startswith("--input-ipc-server=")][0]
+server = socket.socket(socket.AF_UNIX)
+server.bind(path)
+server.listen(1)
+conn, _ = server.accept()
+properties = {}
+
+def send(message):
+    conn.sendall((json.dumps(message) + "\\n").encode())
+
+for line in conn.makefile("rb"):
+    message = json.loads(line)
+    command, request_id = message["command"], message["request_id"]
+    name = command["name"] if isinstance(command, dict) else command[0]
+    if name == "hang":
+        continue
+    if name == "set_property":
+        properties[command[1]] = command[2]
+    data = properties.get(command[1]) if name == "get_property" else None
+    send({"request_id": request_id, "error": "success", "data": data})
+    if name == "quit":
+        break
+"""
+
+
+@pytest.fixture
+def fake_mpv(tmp_path):
+    script = tmp_path / "mpv"
+    script.write_text(f"#!{sys.executable}\n{FAKE_MPV}")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_properties_round_trip(fake_mpv):
+    ipc = MpvIpc(executable=fake_mpv, request_timeout=2.0)
+    try:
+        ipc.volume = 50
+        assert ipc.volume == 50
+    finally:
+        ipc.terminate()
+
+
+def test_hung_process_is_restarted(fake_mpv):
+    ipc = MpvIpc(executable=fake_mpv, request_timeout=0.2, max_timeouts=2)
+    restarted = threading.Event()
+    ipc.set_restart_callback(restarted.set)
+    try:
+        ipc.volume = 50
+        first_pid = ipc._process.pid
+
+        with pytest.raises(TimeoutError):
+            ipc._request(["hang"])
+        assert not restarted.is_set()
+        with pytest.raises(TimeoutError):
+            ipc._request(["hang"])
+
+        assert restarted.wait(10)
+        assert ipc._process.pid != first_pid
+        # Properties set before the restart are restored
+        assert ipc.volume == 50
+    finally:
+        ipc.terminate()
+
+
+def test_answer_resets_timeout_count(fake_mpv):
+    ipc = MpvIpc(executable=fake_mpv, request_timeout=0.2, max_timeouts=2)
+    restarted = threading.Event()
+    ipc.set_restart_callback(restarted.set)
+    try:
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                ipc._request(["hang"])
+            ipc.volume = 10
+        assert not restarted.wait(0.5)
+    finally:
+        ipc.terminate()
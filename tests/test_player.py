@@ -0,0 +1,238 @@
+"""Player against an in-process stand-in for mpv; needs neither libmpv nor Qt."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api.api import API
+from api.play_book import PlayBook
+from app.Player import CachedSource, Player
+
+
+class FakeMpv:
+    """Answers the calls Player makes, and reports them back like mpv's event thread would."""
+
+    def __init__(self):
+        self._observers = {}
+        self._events = {}
+        # mpv property -> thread that last set it
+        self._set_on = {}
+        self.loaded = []
+        self.appended = []
+        self.seeks = []
+        # Seconds before a loadfile is confirmed with file-loaded
+        self.load_delay = 0.0
+
+    def property_observer(self, name):
+        def register(callback):
+            self._observers.setdefault(name, []).append(callback)
+            return callback
+        return register
+
+    def event_callback(self, *event_types):
+        def register(callback):
+            for event_type in event_types:
+                self._events.setdefault(event_type, []).append(callback)
+            return callback
+        return register
+
+    def register_stream_protocol(self, name, open_fn):
+        pass
+
+    def _report(self, name, value):
+        threading.Thread(target=lambda: [cb(name, value) for cb in self._observers.get(name, [])]).start()
+
+    def loadfile(self, source, mode="replace", **options):
+        self.loaded.append((source, options))
+        threading.Timer(self.load_delay, lambda: [cb(None) for cb in self._events.get("file-loaded", [])]).start()
+
+    def playlist_append(self, source):
+        self.appended.append(source)
+
+    def seek(self, amount, reference="relative", precision="default-precise"):
+        self.seeks.append(amount)
+
+    def stop(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_") and "_set_on" in self.__dict__:
+            self._set_on[name] = threading.current_thread().name
+        if name == "pause":
+            self._report("pause", value)
+
+
+class FakePlayer(Player):
+    _instance = None
+
+    @staticmethod
+    def _create_mpv(backend):
+        return FakeMpv()
+
+
+class RecordingBar:
+    """The parts of PlayerBar the Player calls."""
+
+    def __init__(self, player):
+        self.player = player
+        self.spinning = []
+
+    def on_book_loaded(self, book):
+        pass
+
+    def update_play_button_state(self):
+        # As PlayerBar does: the record spins while playing and not paused
+        self.spinning.append(bool(self.player.playing and not self.player.paused))
+
+
+def make_book(files=2):
+    return PlayBook.from_dict({
+        "id": "session",
+        "libraryItemId": "item",
+        "displayTitle": "Book",
+        "duration": 20.0 * files,
+        "chapters": [{"id": i, "start": 20.0 * i, "end": 20.0 * (i + 1), "title": f"Chapter {i}"}
+                     for i in range(files)],
+        "audioTracks": [{"index": i, "startOffset": 20.0 * i, "duration": 20.0,
+                         "contentUrl": f"/audio/{i}.mp3", "metadata": {"bytes": 10}}
+                        for i in range(files)],
+    })
+
+
+class GatedUpstream(BaseHTTPRequestHandler):
+    """Serves 10-byte files, each response held until `release` is set."""
+    protocol_version = "HTTP/1.1"
+    release = threading.Event()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.release.wait(10)
+        self.send_response(200)
+        self.send_header("Content-Length", "10")
+        self.end_headers()
+        self.wfile.write(b"y" * 10)
+
+
+@pytest.fixture
+def upstream():
+    GatedUpstream.release = threading.Event()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GatedUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    GatedUpstream.release.set()
+    server.shutdown()
+
+
+@pytest.fixture
+def api(upstream, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    api = API(upstream)
+    api.set_token("token")
+    return api
+
+
+@pytest.fixture
+def player(api):
+    FakePlayer._instance = None
+    player = FakePlayer(api, source=CachedSource())
+    player.use_timeline = False
+    yield player
+    for executor in (player.commands, player.control, player.prefetch):
+        executor.shutdown()
+
+
+def cache_files(api, book, count=None):
+    api.audio_cache_dir.mkdir(parents=True, exist_ok=True)
+    for file_index in range(len(book.media_files) if count is None else count):
+        (api.audio_cache_dir / f"{api._get_file_cache_key(book.title, file_index)}.mp3").write_bytes(b"x" * 10)
+
+
+def test_play_spins_the_record(api, player):
+    book = make_book()
+    cache_files(api, book)
+    bar = RecordingBar(player)
+    player.set_player_bar(bar)
+
+    assert player.load_book(book)
+    assert player.play()
+    assert bar.spinning[-1] is True
+
+    assert player.pause()
+    assert bar.spinning[-1] is False
+    assert player.play()
+    assert bar.spinning[-1] is True
+
+
+def test_seek_into_missing_file_does_not_block(api, player):
+    book = make_book()
+    cache_files(api, book, count=1)
+    finished = []
+    done = threading.Event()
+    player.set_seek_callback(lambda position, success: (finished.append((position, success)), done.set()))
+
+    assert player.load_book(book)
+    started = time.monotonic()
+    # File 1 is still downloading; the seek must not wait for it
+    assert player.seek_to_position(25.0)
+    assert time.monotonic() - started < 1.0
+    assert player.current_file_index == 0
+    assert not done.is_set()
+
+    GatedUpstream.release.set()
+    assert done.wait(10)
+    assert finished == [(25.0, True)]
+    assert player.current_file_index == 1
+    assert player.global_position == 25.0
+    assert player.player.loaded[-1][0] == player._downloaded_path(1)
+
+
+def test_newer_seek_supersedes_waiting_one(api, player):
+    book = make_book()
+    cache_files(api, book, count=1)
+    finished = []
+    player.set_seek_callback(lambda position, success: finished.append((position, success)))
+
+    assert player.load_book(book)
+    assert player.seek_to_position(25.0)
+    # Back within the loaded file before the download finishes
+    assert player.seek_to_position(5.0)
+    GatedUpstream.release.set()
+    player.control.call(lambda: None)
+
+    assert finished == []
+    assert player.current_file_index == 0
+    assert player.global_position == 5.0
+
+
+def test_slow_load_does_not_hold_the_playlist(api, player):
+    book = make_book()
+    cache_files(api, book)
+    assert player.load_book(book)
+
+    player.player.load_delay = 1.0
+    loads = len(player.player.loaded)
+    loading = threading.Thread(target=player._load_media, args=(0, 3.0))
+    loading.start()
+    deadline = time.monotonic() + 5
+    while len(player.player.loaded) == loads and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # As from mpv's event thread or a download worker, while mpv opens the file
+    started = time.monotonic()
+    player._extend_playlist()
+    assert time.monotonic() - started < 0.5
+    loading.join()
+
+
+def test_mpv_is_only_touched_from_the_command_executor(player):
+    player.commands.call(lambda: None)
+    assert player.player.volume == 100
+    assert player.player._set_on["volume"] == "mpv-commands"
@@ -0,0 +1,44 @@
+"""ReadAheadController; needs neither mpv nor Qt."""
+from app.Player import ReadAheadController
+
+
+def test_starts_eagerly_without_throughput():
+    controller = ReadAheadController()
+    assert controller.should_start_next(3600.0, 1.0, 50_000_000)
+
+
+def test_waits_until_download_time_is_near():
+    controller = ReadAheadController(safety_factor=1.5, margin_seconds=30.0)
+    controller.record(1_000_000, 1.0)
+    # 10 MB at 1 MB/s: 10s, with safety and margin 45s of wall time
+    assert not controller.should_start_next(46.0, 1.0, 10_000_000)
+    assert controller.should_start_next(45.0, 1.0, 10_000_000)
+
+
+def test_speed_shortens_wall_time():
+    controller = ReadAheadController(safety_factor=1.5, margin_seconds=30.0)
+    controller.record(1_000_000, 1.0)
+    # 90 media seconds are 45 wall seconds at 2x
+    assert not controller.should_start_next(90.0, 1.0, 10_000_000)
+    assert controller.should_start_next(90.0, 2.0, 10_000_000)
+
+
+def test_throughput_is_smoothed():
+    controller = ReadAheadController(smoothing=0.5)
+    controller.record(1000, 1.0)
+    controller.record(3000, 1.0)
+    assert controller.throughput == 2000
+    # Empty samples are ignored
+    controller.record(0, 1.0)
+    controller.record(1000, 0.0)
+    assert controller.throughput == 2000
+
+
+def test_cache_seconds():
+    controller = ReadAheadController(cache_wall_seconds=20.0)
+    assert controller.cache_seconds(1.0) == 20.0
+    assert controller.cache_seconds(0.5) == 20.0
+    assert controller.cache_seconds(2.0) == 40.0
+    # Capped by what's left of the file, but never below the wall time
+    assert controller.cache_seconds(2.0, remaining_media_seconds=30.0) == 30.0
+    assert controller.cache_seconds(2.0, remaining_media_seconds=5.0) == 20.0
@@ -0,0 +1,125 @@
+import struct
+
+from api.seek_index import SeekIndex, build_seek_index
+
+
+def reader(data: bytes):
+    return lambda offset, length: data[offset:offset + length]
+
+
+# MP4
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def full_box(kind: bytes, payload: bytes) -> bytes:
+    return box(kind, b"\0\0\0\0" + payload)
+
+
+def mp4_file(handler: bytes = b"soun", leading_text_track: bool = False) -> bytes:
+    """10 chunks of 1000 bytes, 2 samples each of 1024 units at timescale 1024: 2s per chunk."""
+    ftyp = box(b"ftyp", b"M4A \0\0\0\0")
+    mdat_start = len(ftyp) + 8
+    mdat = box(b"mdat", b"\0" * 10000)
+
+    stco = full_box(b"stco", struct.pack(">I", 10) + b"".join(
+        struct.pack(">I", mdat_start + i * 1000) for i in range(10)))
+    stsc = full_box(b"stsc", struct.pack(">I", 1) + struct.pack(">III", 1, 2, 1))
+    stts = full_box(b"stts", struct.pack(">I", 1) + struct.pack(">II", 20, 1024))
+    mdhd = full_box(b"mdhd", struct.pack(">IIII", 0, 0, 1024, 20480) + b"\0\0\0\0")
+
+    def trak(kind: bytes) -> bytes:
+        hdlr = full_box(b"hdlr", b"\0\0\0\0" + kind + b"\0" * 12)
+        return box(b"trak", box(b"mdia", mdhd + hdlr + box(b"minf", box(b"stbl", stts + stsc + stco))))
+
+    tracks = (trak(b"text") if leading_text_track else b"") + trak(handler)
+    return ftyp + mdat + box(b"moov", tracks)
+
+
+def test_mp4_chunk_offsets():
+    data = mp4_file()
+    index = build_seek_index(reader(data), len(data))
+
+    assert index.duration == 20.0
+    assert index.points[:3] == [(0.0, 24), (2.0, 1024), (4.0, 2024)]
+    assert index.byte_offset(0.0) == 24
+    assert index.byte_offset(4.0) == 2024
+    # Halfway between the chunks at 4s and 6s
+    assert index.byte_offset(5.0) == 2524
+
+
+def test_mp4_skips_non_audio_tracks():
+    data = mp4_file(leading_text_track=True)
+    index = build_seek_index(reader(data), len(data))
+    assert index is not None
+    assert index.byte_offset(2.0) == 1024
+
+
+def test_mp4_without_audio_track():
+    data = mp4_file(handler=b"vide")
+    assert build_seek_index(reader(data), len(data)) is None
+
+
+# MP3
+
+# MPEG-1 layer III, 128 kbit/s, 44.1 kHz, stereo: 417-byte frames
+MP3_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MP3_FRAME = 417
+ID3_TAG = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\0" * 10
+
+
+def test_mp3_cbr_is_proportional():
+    data = ID3_TAG + (MP3_HEADER + b"\0" * (MP3_FRAME - 4)) * 100
+    index = build_seek_index(reader(data), len(data))
+
+    audio_bytes = len(data) - len(ID3_TAG)
+    assert index.duration == audio_bytes * 8 / 128000
+    assert index.byte_offset(0.0) == len(ID3_TAG)
+    assert index.byte_offset(index.duration) == len(data)
+    # 16000 bytes per second, give or take rounding
+    assert abs(index.byte_offset(1.0) - (len(ID3_TAG) + 16000)) <= 1
+
+
+def test_mp3_xing_toc():
+    frames, total_bytes = 1000, 400000
+    # TOC entry i: byte position of i% of the duration, in 1/256ths
+    toc = bytes(min(255, i * 2) for i in range(100))
+    xing = b"Xing" + struct.pack(">III", 0x7, frames, total_bytes) + toc
+    # Side info is 32 bytes for MPEG-1 stereo
+    first_frame = MP3_HEADER + b"\0" * 32 + xing
+    first_frame += b"\0" * (MP3_FRAME - len(first_frame))
+    data = ID3_TAG + first_frame + b"\0" * (total_bytes - MP3_FRAME)
+    index = build_seek_index(reader(data), len(data))
+
+    duration = frames * 1152 / 44100
+    assert index.duration == duration
+    start = len(ID3_TAG)
+    assert index.byte_offset(0.0) == start
+    assert index.byte_offset(duration * 10 / 100) == start + int(20 / 256 * total_bytes)
+    assert index.byte_offset(duration) == start + total_bytes
+
+
+def test_not_audio():
+    data = b"\0" * 8192
+    assert build_seek_index(reader(data), len(data)) is None
+
+
+# SeekIndex
+
+def test_byte_offset_clamps_and_interpolates():
+    index = SeekIndex(10.0, [(0.0, 100), (5.0, 600), (10.0, 1100)])
+    assert index.byte_offset(-1.0) == 100
+    assert index.byte_offset(2.5) == 350
+    assert index.byte_offset(20.0) == 1100
+    assert SeekIndex(0.0, []).byte_offset(3.0) == 0
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "file.seek.json"
+    SeekIndex(10.0, [(0.0, 100), (10.0, 1100)]).save(path)
+
+    loaded = SeekIndex.load(path)
+    assert loaded.duration == 10.0
+    assert loaded.points == [(0.0, 100), (10.0, 1100)]
+    assert SeekIndex.load(tmp_path / "missing.json") is None
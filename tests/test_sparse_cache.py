@@ -0,0 +1,104 @@
+import pytest
+
+from api.sparse_cache import SparseAudioFile
+
+BLOCK = 16
+
+
+def make(tmp_path, size=None):
+    sparse = SparseAudioFile(tmp_path / "key.blocks", block_size=BLOCK)
+    if size is not None:
+        sparse.set_size(size)
+    return sparse
+
+
+def test_block_range(tmp_path):
+    sparse = make(tmp_path, size=40)
+    assert sparse.block_count == 3
+    assert sparse.block_range(0) == (0, 16)
+    # The last block is short
+    assert sparse.block_range(2) == (32, 40)
+
+
+def test_block_range_needs_size(tmp_path):
+    with pytest.raises(ValueError):
+        make(tmp_path).block_range(0)
+
+
+def test_bitmap_persists(tmp_path):
+    sparse = make(tmp_path, size=40)
+    sparse.write_block(0, b"a" * 16)
+    sparse.write_block(2, b"c" * 8)
+
+    reloaded = make(tmp_path)
+    assert reloaded.size == 40
+    assert reloaded.present_blocks() == [0, 2]
+    assert reloaded.read_block(2) == b"c" * 8
+    assert not reloaded.is_complete()
+
+
+def test_other_block_size_is_ignored(tmp_path):
+    make(tmp_path, size=40).write_block(0, b"a" * 16)
+    other = SparseAudioFile(tmp_path / "key.blocks", block_size=BLOCK * 2)
+    assert other.size is None
+    assert other.present_blocks() == []
+
+
+def test_new_size_invalidates_blocks(tmp_path):
+    sparse = make(tmp_path, size=40)
+    sparse.write_block(0, b"a" * 16)
+    sparse.set_size(48)
+    assert sparse.present_blocks() == []
+    assert not sparse.block_path(0).exists()
+
+
+def test_write_block_checks_length(tmp_path):
+    with pytest.raises(ValueError):
+        make(tmp_path, size=40).write_block(0, b"short")
+
+
+def test_missing_run(tmp_path):
+    sparse = make(tmp_path, size=16 * 6)
+    for index in (0, 3):
+        sparse.write_block(index, b"x" * 16)
+
+    assert sparse.missing_run(0, 5) == (1, 2)
+    assert sparse.missing_run(3, 5) == (4, 5)
+    assert sparse.missing_run(0, 0) is None
+
+
+def test_evict_and_assemble(tmp_path):
+    sparse = make(tmp_path, size=40)
+    for index, data in enumerate((b"a" * 16, b"b" * 16, b"c" * 8)):
+        sparse.write_block(index, data)
+    assert sparse.is_complete()
+
+    destination = tmp_path / "key.mp3"
+    sparse.assemble(destination)
+    assert destination.read_bytes() == b"a" * 16 + b"b" * 16 + b"c" * 8
+
+    sparse.evict_block(1)
+    assert sparse.present_blocks() == [0, 2]
+    assert not sparse.block_path(1).exists()
+
+
+def test_remove_waits_for_readers(tmp_path):
+    sparse = make(tmp_path, size=40)
+    sparse.write_block(0, b"a" * 16)
+
+    with sparse.reading():
+        sparse.remove()
+        assert sparse.removal_pending
+        assert sparse.read_block(0) == b"a" * 16
+        assert sparse.block_range(0) == (0, 16)
+
+    assert not sparse.directory.exists()
+    assert sparse.size is None
+    assert not sparse.removal_pending
+
+
+def test_remove_without_readers(tmp_path):
+    sparse = make(tmp_path, size=40)
+    sparse.write_block(0, b"a" * 16)
+    sparse.remove()
+    assert not sparse.directory.exists()